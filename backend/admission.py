@@ -0,0 +1,161 @@
+import asyncio
+import math
+import os
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Deque, Dict
+
+
+class AdmissionRejected(Exception):
+    """Raised when a request cannot be queued; carries a Retry-After hint."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f"Admission rejected, retry after {retry_after}s")
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Concurrency cap with bounded per-key queues and round-robin fairness.
+
+    At most ``max_concurrency`` requests run at once, and at most
+    ``per_job_concurrency`` of them for the same job. Excess requests wait in a
+    per-job FIFO queue of at most ``per_job_queue_limit`` entries; free slots
+    are handed out round-robin across jobs so one hot job cannot starve the
+    rest. When a queue is full (or a request waits longer than
+    ``max_wait_seconds``) the request is rejected with a Retry-After estimate.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = 32,
+        per_job_concurrency: int = 8,
+        per_job_queue_limit: int = 200,
+        max_wait_seconds: float = 10.0,
+    ):
+        self.max_concurrency = max_concurrency
+        self.per_job_concurrency = per_job_concurrency
+        self.per_job_queue_limit = per_job_queue_limit
+        self.max_wait_seconds = max_wait_seconds
+        self._active = 0
+        self._active_per_job: Dict[str, int] = {}
+        self._queues: "OrderedDict[str, Deque[asyncio.Future]]" = OrderedDict()
+        # Exponentially weighted average of time spent holding a slot
+        self._avg_service_seconds = 0.05
+        self.rejected = 0
+
+    @asynccontextmanager
+    async def slot(self, job_id: str):
+        """Hold an admission slot for ``job_id`` for the duration of the block."""
+        await self.acquire(job_id)
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            elapsed = time.monotonic() - started
+            self._avg_service_seconds = 0.9 * self._avg_service_seconds + 0.1 * elapsed
+            self.release(job_id)
+
+    async def acquire(self, job_id: str):
+        """Wait for a slot, or raise ``AdmissionRejected`` if saturated."""
+        if not self._queues.get(job_id) and self._has_capacity(job_id):
+            self._grant(job_id)
+            return
+
+        queue = self._queues.setdefault(job_id, deque())
+        if len(queue) >= self.per_job_queue_limit:
+            self.rejected += 1
+            raise AdmissionRejected(self._retry_after(len(queue)))
+
+        future = asyncio.get_running_loop().create_future()
+        queue.append(future)
+        try:
+            await asyncio.wait_for(asyncio.shield(future), timeout=self.max_wait_seconds)
+        except (asyncio.TimeoutError, asyncio.CancelledError) as e:
+            if future.done() and not future.cancelled():
+                # Slot was granted just as we gave up; hand it back
+                self.release(job_id)
+            else:
+                future.cancel()
+                self._discard(job_id, future)
+            if isinstance(e, asyncio.TimeoutError):
+                self.rejected += 1
+                raise AdmissionRejected(self._retry_after(len(self._queues.get(job_id, ()))))
+            raise
+
+    def release(self, job_id: str):
+        """Return a slot and hand it to the next waiting job in round-robin order."""
+        self._active -= 1
+        remaining = self._active_per_job.get(job_id, 1) - 1
+        if remaining > 0:
+            self._active_per_job[job_id] = remaining
+        else:
+            self._active_per_job.pop(job_id, None)
+        self._dispatch()
+
+    def stats(self) -> Dict[str, int]:
+        """Snapshot of current load, for logging and health endpoints."""
+        return {
+            "active": self._active,
+            "queued": sum(len(q) for q in self._queues.values()),
+            "queued_jobs": len(self._queues),
+            "rejected": self.rejected,
+        }
+
+    def _has_capacity(self, job_id: str) -> bool:
+        return (
+            self._active < self.max_concurrency
+            and self._active_per_job.get(job_id, 0) < self.per_job_concurrency
+        )
+
+    def _grant(self, job_id: str):
+        self._active += 1
+        self._active_per_job[job_id] = self._active_per_job.get(job_id, 0) + 1
+
+    def _dispatch(self):
+        while self._active < self.max_concurrency and self._queues:
+            granted = False
+            for job_id in list(self._queues):
+                queue = self._queues[job_id]
+                # Rotate so the next pass starts with a different job
+                self._queues.move_to_end(job_id)
+                while queue and queue[0].done():
+                    queue.popleft()
+                if not queue:
+                    del self._queues[job_id]
+                    continue
+                if not self._has_capacity(job_id):
+                    continue
+                future = queue.popleft()
+                if not queue:
+                    del self._queues[job_id]
+                self._grant(job_id)
+                future.set_result(True)
+                granted = True
+                break
+            if not granted:
+                break
+
+    def _discard(self, job_id: str, future: asyncio.Future):
+        queue = self._queues.get(job_id)
+        if queue is None:
+            return
+        try:
+            queue.remove(future)
+        except ValueError:
+            pass
+        if not queue:
+            del self._queues[job_id]
+
+    def _retry_after(self, queued: int) -> int:
+        parallelism = max(1, min(self.per_job_concurrency, self.max_concurrency))
+        return max(1, math.ceil(self._avg_service_seconds * (queued + 1) / parallelism))
+
+
+# Global admission controller for the apply endpoint
+apply_admission = AdmissionController(
+    max_concurrency=int(os.getenv("APPLY_MAX_CONCURRENCY", "32")),
+    per_job_concurrency=int(os.getenv("APPLY_PER_JOB_CONCURRENCY", "8")),
+    per_job_queue_limit=int(os.getenv("APPLY_PER_JOB_QUEUE_LIMIT", "200")),
+    max_wait_seconds=float(os.getenv("APPLY_MAX_WAIT_SECONDS", "10")),
+)
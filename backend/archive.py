@@ -0,0 +1,188 @@
+import asyncio
+import gzip
+import json
+import os
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReplaceOne
+from models import JobStatus
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class JobArchiver:
+    """Moves closed jobs past the retention window, with their applications, out of the hot collections.
+
+    Each batch is copied into ``jobs_archive``/``applications_archive`` with
+    idempotent upserts before anything is deleted from ``jobs`` and
+    ``applications``. A run interrupted at any point can simply be started
+    again: already-copied documents are overwritten, and a batch whose
+    deletes were cut short is finished first. Progress is recorded in
+    ``archive_runs``. When ``export_dir`` is set, every batch is also written
+    there as gzipped JSON Lines for cold storage.
+    """
+
+    def __init__(
+        self,
+        retention_days: int = 180,
+        batch_size: int = 200,
+        application_batch_size: int = 1000,
+        export_dir: Optional[str] = None,
+    ):
+        self.retention = timedelta(days=retention_days)
+        self.batch_size = batch_size
+        self.application_batch_size = application_batch_size
+        self.export_dir = Path(export_dir) if export_dir else None
+
+    async def ensure_indexes(self, db: AsyncIOMotorClient):
+        await db.jobs_archive.create_index("id", unique=True)
+        await db.applications_archive.create_index("id", unique=True)
+        await db.applications_archive.create_index("job_id")
+        await db.applications.create_index("job_id")
+
+    async def create_run(self, db: AsyncIOMotorClient, now: Optional[datetime] = None) -> Dict[str, Any]:
+        """Record a new run in ``archive_runs`` and return its summary, ready for ``run``."""
+        now = now or datetime.utcnow()
+        run_id = f"{now:%Y%m%dT%H%M%S}-{uuid.uuid4().hex[:6]}"
+        summary = {"run_id": run_id, "cutoff": now - self.retention, "archived_jobs": 0, "archived_applications": 0}
+        await db.archive_runs.insert_one({"_id": run_id, "started_at": now, **summary})
+        return summary
+
+    async def run(
+        self, db: AsyncIOMotorClient, now: Optional[datetime] = None, summary: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """Archive every eligible job in batches and return a summary of the run.
+
+        Pass the ``summary`` from ``create_run`` to carry out a run that was
+        already recorded (e.g. one started in the background).
+        """
+        await self._resume_interrupted(db)
+        summary = summary or await self.create_run(db, now)
+        run_id, cutoff = summary["run_id"], summary["cutoff"]
+
+        batch_number = 0
+        while True:
+            jobs = await db.jobs.find(
+                {"status": JobStatus.CLOSED.value, "application_end_date": {"$lt": cutoff}}
+            ).limit(self.batch_size).to_list(length=self.batch_size)
+            if not jobs:
+                break
+
+            batch_number += 1
+            archived_applications = await self._archive_batch(db, run_id, jobs, f"{run_id}-{batch_number:05d}")
+            summary["archived_jobs"] += len(jobs)
+            summary["archived_applications"] += archived_applications
+            await db.archive_runs.update_one(
+                {"_id": run_id},
+                {"$set": {
+                    "archived_jobs": summary["archived_jobs"],
+                    "archived_applications": summary["archived_applications"],
+                    "last_batch_at": datetime.utcnow(),
+                }},
+            )
+
+        await db.archive_runs.update_one({"_id": run_id}, {"$set": {"finished_at": datetime.utcnow()}})
+        logger.info(
+            f"Archived {summary['archived_jobs']} jobs and {summary['archived_applications']} applications"
+        )
+        return summary
+
+    async def get_run(self, db: AsyncIOMotorClient, run_id: str) -> Optional[Dict[str, Any]]:
+        """Return the progress of a run, or ``None`` if there is no such run."""
+        run = await db.archive_runs.find_one({"_id": run_id}, {"pending_job_ids": 0})
+        if run is not None:
+            run.pop("_id")
+            run["finished"] = "finished_at" in run
+        return run
+
+    async def find_archived_job(self, db: AsyncIOMotorClient, job_id: str) -> Optional[Dict[str, Any]]:
+        """Look up a job in the archive (read path for hot-collection misses)."""
+        return await db.jobs_archive.find_one({"id": job_id})
+
+    async def _archive_batch(
+        self, db: AsyncIOMotorClient, run_id: str, jobs: List[Dict[str, Any]], batch_name: str
+    ) -> int:
+        archived_at = datetime.utcnow()
+        job_ids = [job["id"] for job in jobs]
+        for job in jobs:
+            job.pop("_id", None)
+            job["archived_at"] = archived_at
+
+        # 1. Copy (idempotent, so an interrupted batch can be redone)
+        await db.jobs_archive.bulk_write(
+            [ReplaceOne({"id": job["id"]}, job, upsert=True) for job in jobs], ordered=False
+        )
+        await self._export(f"jobs-{batch_name}", jobs)
+
+        archived_applications = 0
+        cursor = db.applications.find({"job_id": {"$in": job_ids}}, batch_size=self.application_batch_size)
+        chunk: List[Dict[str, Any]] = []
+        chunk_number = 0
+        async for application in cursor:
+            application.pop("_id", None)
+            application["archived_at"] = archived_at
+            chunk.append(application)
+            if len(chunk) == self.application_batch_size:
+                chunk_number += 1
+                archived_applications += await self._copy_applications(db, chunk, f"{batch_name}-{chunk_number:04d}")
+                chunk = []
+        if chunk:
+            chunk_number += 1
+            archived_applications += await self._copy_applications(db, chunk, f"{batch_name}-{chunk_number:04d}")
+
+        # 2. Delete from the hot collections only after everything is copied.
+        # The batch is recorded first so an interruption between the two
+        # deletes is finished by the next run.
+        await db.archive_runs.update_one({"_id": run_id}, {"$set": {"pending_job_ids": job_ids}})
+        await db.jobs.delete_many({"id": {"$in": job_ids}, "status": JobStatus.CLOSED.value})
+        await self._finish_pending(db, run_id, job_ids)
+        return archived_applications
+
+    async def _finish_pending(self, db: AsyncIOMotorClient, run_id: str, job_ids: List[str]):
+        # Jobs still in the hot collection were reopened meanwhile: keep them hot
+        reopened = [job["id"] for job in await db.jobs.find(
+            {"id": {"$in": job_ids}}, {"id": 1}
+        ).to_list(length=len(job_ids))]
+        if reopened:
+            await db.jobs_archive.delete_many({"id": {"$in": reopened}})
+            await db.applications_archive.delete_many({"job_id": {"$in": reopened}})
+        reopened_ids = set(reopened)
+        archived_ids = [job_id for job_id in job_ids if job_id not in reopened_ids]
+        await db.applications.delete_many({"job_id": {"$in": archived_ids}})
+        await db.archive_runs.update_one({"_id": run_id}, {"$unset": {"pending_job_ids": ""}})
+
+    async def _resume_interrupted(self, db: AsyncIOMotorClient):
+        async for interrupted in db.archive_runs.find({"pending_job_ids": {"$exists": True}}):
+            logger.info(f"Finishing interrupted archive batch from run {interrupted['_id']}")
+            await self._finish_pending(db, interrupted["_id"], interrupted["pending_job_ids"])
+
+    async def _copy_applications(self, db: AsyncIOMotorClient, applications: List[Dict[str, Any]], name: str) -> int:
+        await db.applications_archive.bulk_write(
+            [ReplaceOne({"id": app["id"]}, app, upsert=True) for app in applications], ordered=False
+        )
+        await self._export(f"applications-{name}", applications)
+        return len(applications)
+
+    async def _export(self, name: str, documents: List[Dict[str, Any]]):
+        if self.export_dir is None:
+            return
+        await asyncio.to_thread(self._write_jsonl, self.export_dir / f"{name}.jsonl.gz", documents)
+
+    @staticmethod
+    def _write_jsonl(path: Path, documents: List[Dict[str, Any]]):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            for document in documents:
+                f.write(json.dumps(document, default=str))
+                f.write("\n")
+
+
+# Global job archiver instance
+job_archiver = JobArchiver(
+    retention_days=int(os.getenv("ARCHIVE_RETENTION_DAYS", "180")),
+    export_dir=os.getenv("ARCHIVE_EXPORT_DIR"),
+)
@@ -0,0 +1,75 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from motor.motor_asyncio import AsyncIOMotorClient
+from models import JobStatus
+
+
+class JobCache:
+    """Small TTL + LRU cache of raw job documents keyed by job id.
+
+    Concurrent misses for the same id share a single database lookup, so a
+    burst of requests for one hot job only costs one ``find_one``.
+    """
+
+    def __init__(self, ttl_seconds: float = 30.0, max_entries: int = 10000):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, Tuple[float, Optional[Dict[str, Any]]]]" = OrderedDict()
+        self._pending: Dict[str, asyncio.Future] = {}
+
+    async def get(self, db: AsyncIOMotorClient, job_id: str) -> Optional[Dict[str, Any]]:
+        """Return the job document, loading it from the database on a miss."""
+        entry = self._entries.get(job_id)
+        if entry is not None and entry[0] > time.monotonic():
+            self._entries.move_to_end(job_id)
+            return entry[1]
+
+        pending = self._pending.get(job_id)
+        if pending is not None:
+            return await asyncio.shield(pending)
+
+        future = asyncio.get_running_loop().create_future()
+        self._pending[job_id] = future
+        try:
+            job = await db.jobs.find_one({"id": job_id})
+            self.set(job_id, job)
+            future.set_result(job)
+            return job
+        except Exception as e:
+            future.set_exception(e)
+            # Mark the exception as retrieved when nobody else is waiting
+            future.exception()
+            raise
+        finally:
+            self._pending.pop(job_id, None)
+
+    async def warm(self, db: AsyncIOMotorClient, limit: int = 200):
+        """Preload the most viewed active jobs so a fresh worker starts with a hot cache."""
+        async for job in db.jobs.find({"status": JobStatus.ACTIVE.value}).sort("views", -1).limit(limit):
+            self.set(job["id"], job)
+
+    def set(self, job_id: str, job: Optional[Dict[str, Any]]):
+        """Store a job document (``None`` caches a miss)."""
+        self._entries[job_id] = (time.monotonic() + self.ttl_seconds, job)
+        self._entries.move_to_end(job_id)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, job_id: str):
+        """Drop a single job from the cache."""
+        self._entries.pop(job_id, None)
+
+    def invalidate_many(self, job_ids):
+        """Drop several jobs from the cache."""
+        for job_id in job_ids:
+            self._entries.pop(job_id, None)
+
+    def clear(self):
+        """Drop every cached job."""
+        self._entries.clear()
+
+
+# Global job cache instance
+job_cache = JobCache()
@@ -0,0 +1,255 @@
+import asyncio
+import inspect
+import os
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import OperationFailure, PyMongoError
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Server error codes meaning change streams can't be used on this deployment
+CHANGE_STREAMS_UNSUPPORTED = {20, 40573}
+# Resume token is no longer in the oplog
+CHANGE_STREAM_HISTORY_LOST = {136, 286}
+
+
+@dataclass
+class ChangeEvent:
+    """A single change to a watched collection.
+
+    ``operation`` is one of ``insert``, ``update``, ``replace``, ``delete`` or
+    ``invalidate``. ``document_id`` is the application-level ``id`` field and
+    ``object_id`` the Mongo ``_id``. For deletes only ``object_id`` comes from
+    the server; ``document_id`` is filled in for collections listed in
+    ``ChangeFeed.track_deletes``. On ``invalidate`` both are ``None`` and
+    consumers should rebuild everything they derived from the collection.
+    """
+    collection: str
+    operation: str
+    document_id: Optional[str] = None
+    document: Optional[Dict[str, Any]] = None
+    object_id: Optional[Any] = None
+
+
+ChangeConsumer = Callable[[ChangeEvent], Any]
+
+
+class ChangeFeed:
+    """Delivers changes on ``jobs``/``users`` to in-process consumers.
+
+    Each collection is tailed with a Mongo change stream when the deployment
+    supports it (replica set or sharded cluster) and polled on ``updated_at``
+    otherwise. Updates that only touch ``ignored_update_fields`` (hot
+    counters like ``views``) are filtered out on the server. Positions are
+    kept in memory per worker: every consumer rebuilds its state on start,
+    so there is nothing to resume across restarts. Call ``mark_positions``
+    before the consumers load their snapshot and ``start`` after, so changes
+    made while loading are replayed instead of lost.
+
+    Polling can't see deletes; with several workers and no replica set, a
+    job deleted through one worker stays in the in-memory indexes of the
+    others until they restart. Closing jobs instead of deleting them avoids
+    this.
+    """
+
+    def __init__(
+        self,
+        collections: List[str] = ("jobs", "users"),
+        poll_interval: float = 2.0,
+        poll_batch_size: int = 500,
+        ignored_update_fields: Optional[Dict[str, List[str]]] = None,
+        track_deletes: List[str] = ("jobs",),
+    ):
+        self.collections = list(collections)
+        self.poll_interval = poll_interval
+        self.poll_batch_size = poll_batch_size
+        self.ignored_update_fields = ignored_update_fields or {}
+        self.track_deletes = set(track_deletes)
+        self._consumers: Dict[str, List[ChangeConsumer]] = {}
+        self._tasks: List[asyncio.Task] = []
+        self._resume_tokens: Dict[str, Any] = {}
+        self._poll_positions: Dict[str, Tuple[datetime, Any]] = {}
+        # Mongo _id -> application id, to name the document in delete events
+        self._object_ids: Dict[str, Dict[Any, str]] = {}
+
+    def register(self, collection: str, consumer: ChangeConsumer):
+        """Register a sync or async callable to receive events for ``collection``."""
+        self._consumers.setdefault(collection, []).append(consumer)
+
+    async def mark_positions(self, db: AsyncIOMotorClient):
+        """Record the current position of every watched collection.
+
+        ``start`` then tails from these positions rather than from whenever
+        its tasks happen to connect.
+        """
+        for collection in self.collections:
+            try:
+                async with db[collection].watch(self._pipeline(collection), full_document="updateLookup") as stream:
+                    if stream.resume_token is not None:
+                        self._resume_tokens[collection] = stream.resume_token
+                    if collection in self.track_deletes:
+                        self._object_ids[collection] = await self._load_object_ids(db, collection)
+            except OperationFailure as e:
+                if e.code not in CHANGE_STREAMS_UNSUPPORTED:
+                    raise
+                position = await self._latest_poll_position(db, collection)
+                if position is not None:
+                    self._poll_positions[collection] = position
+
+    async def start(self, db: AsyncIOMotorClient):
+        """Start one tailing task per watched collection."""
+        if self._tasks:
+            return
+        for collection in self.collections:
+            await db[collection].create_index([("updated_at", 1), ("_id", 1)])
+            self._tasks.append(asyncio.create_task(self._run(db, collection)))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def dispatch(self, event: ChangeEvent):
+        """Deliver an event to every consumer of its collection."""
+        for consumer in self._consumers.get(event.collection, ()):
+            try:
+                result = consumer(event)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Change feed consumer failed for {event.collection}: {str(e)}")
+
+    async def simulate(
+        self,
+        collection: str,
+        operation: str,
+        document: Optional[Dict[str, Any]] = None,
+        document_id: Optional[str] = None,
+    ):
+        """Dispatch a synthetic event, for exercising consumers without MongoDB.
+
+        Deletes carry no document, so pass the deleted ``document_id``.
+        """
+        if document is not None:
+            document_id = document.get("id")
+        await self.dispatch(ChangeEvent(collection, operation, document_id, document))
+
+    async def _run(self, db: AsyncIOMotorClient, collection: str):
+        while True:
+            try:
+                await self._watch(db, collection)
+            except OperationFailure as e:
+                if e.code in CHANGE_STREAMS_UNSUPPORTED:
+                    logger.info(f"Change streams unavailable, polling {collection} on updated_at")
+                    await self._poll(db, collection)
+                    return
+                if e.code in CHANGE_STREAM_HISTORY_LOST:
+                    logger.warning(f"Change stream history lost for {collection}, resetting consumers")
+                    self._resume_tokens.pop(collection, None)
+                    self._object_ids.pop(collection, None)
+                    await self.dispatch(ChangeEvent(collection, "invalidate"))
+                    continue
+                logger.error(f"Change stream for {collection} failed: {str(e)}")
+            except PyMongoError as e:
+                logger.error(f"Change stream for {collection} failed: {str(e)}")
+            await asyncio.sleep(self.poll_interval)
+
+    def _pipeline(self, collection: str) -> List[Dict[str, Any]]:
+        ignored = list(self.ignored_update_fields.get(collection, ()))
+        if not ignored:
+            return []
+        updated_fields = {"$map": {
+            "input": {"$objectToArray": "$updateDescription.updatedFields"},
+            "in": "$$this.k",
+        }}
+        return [{"$match": {"$or": [
+            {"operationType": {"$ne": "update"}},
+            {"updateDescription.removedFields.0": {"$exists": True}},
+            {"$expr": {"$gt": [{"$size": {"$setDifference": [updated_fields, ignored]}}, 0]}},
+        ]}}]
+
+    async def _watch(self, db: AsyncIOMotorClient, collection: str):
+        async with db[collection].watch(
+            self._pipeline(collection),
+            full_document="updateLookup",
+            resume_after=self._resume_tokens.get(collection),
+        ) as stream:
+            if collection in self.track_deletes and collection not in self._object_ids:
+                self._object_ids[collection] = await self._load_object_ids(db, collection)
+            object_ids = self._object_ids.get(collection)
+
+            async for change in stream:
+                operation = change["operationType"]
+                if operation == "invalidate":
+                    self._resume_tokens.pop(collection, None)
+                    self._object_ids.pop(collection, None)
+                    await self.dispatch(ChangeEvent(collection, "invalidate"))
+                    return
+                object_id = change.get("documentKey", {}).get("_id")
+                document = change.get("fullDocument")
+                document_id = document.get("id") if document else None
+                if object_ids is not None:
+                    if document is not None:
+                        object_ids[object_id] = document_id
+                    elif operation == "delete":
+                        document_id = object_ids.pop(object_id, None)
+                        if document_id is None:
+                            # Deleted before we could learn its id: rebuild rather than guess
+                            logger.warning(f"Unidentified delete in {collection}, resetting consumers")
+                            await self.dispatch(ChangeEvent(collection, "invalidate"))
+                            self._resume_tokens[collection] = stream.resume_token
+                            continue
+                await self.dispatch(ChangeEvent(collection, operation, document_id, document, object_id))
+                self._resume_tokens[collection] = stream.resume_token
+
+    async def _load_object_ids(self, db: AsyncIOMotorClient, collection: str) -> Dict[Any, str]:
+        return {document["_id"]: document.get("id") async for document in db[collection].find({}, {"id": 1})}
+
+    async def _latest_poll_position(self, db: AsyncIOMotorClient, collection: str) -> Optional[Tuple[datetime, Any]]:
+        latest = await db[collection].find({}, {"updated_at": 1}).sort(
+            [("updated_at", -1), ("_id", -1)]
+        ).limit(1).to_list(length=1)
+        if latest:
+            return latest[0].get("updated_at"), latest[0]["_id"]
+        return None
+
+    async def _poll(self, db: AsyncIOMotorClient, collection: str):
+        if collection not in self._poll_positions:
+            position = await self._latest_poll_position(db, collection)
+            if position is not None:
+                self._poll_positions[collection] = position
+        while True:
+            try:
+                # Keyset on (updated_at, _id) so bulk updates sharing one timestamp page correctly
+                position = {}
+                if collection in self._poll_positions:
+                    last_seen, last_object_id = self._poll_positions[collection]
+                    position = {"$or": [
+                        {"updated_at": {"$gt": last_seen}},
+                        {"updated_at": last_seen, "_id": {"$gt": last_object_id}},
+                    ]}
+                documents = await db[collection].find(position).sort(
+                    [("updated_at", 1), ("_id", 1)]
+                ).limit(self.poll_batch_size).to_list(length=self.poll_batch_size)
+
+                for document in documents:
+                    await self.dispatch(ChangeEvent(collection, "update", document.get("id"), document, document["_id"]))
+                    self._poll_positions[collection] = (document.get("updated_at"), document["_id"])
+
+                if len(documents) == self.poll_batch_size:
+                    continue
+            except PyMongoError as e:
+                logger.error(f"Polling {collection} failed: {str(e)}")
+            await asyncio.sleep(self.poll_interval)
+
+
+# Global change feed instance
+change_feed = ChangeFeed(
+    poll_interval=float(os.getenv("CHANGE_FEED_POLL_SECONDS", "2")),
+    # Counter bumps from views and applications don't change anything the consumers index
+    ignored_update_fields={"jobs": ["views", "applications_count"]},
+)
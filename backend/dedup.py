@@ -0,0 +1,172 @@
+import re
+import zlib
+from typing import Any, Dict, List, Optional, Set, Tuple
+import numpy as np
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from models import JobStatus
+from change_feed import ChangeEvent
+
+# Words that vary between re-posts of the same notice without changing its meaning
+STOPWORDS = {
+    "a", "an", "and", "for", "in", "of", "on", "the", "to",
+    "online", "form", "forms", "apply", "post", "posts", "vacancy", "vacancies",
+    "recruitment", "notification", "notice", "application", "applications",
+}
+MAX_DESCRIPTION_TOKENS = 50
+_MERSENNE_PRIME = (1 << 31) - 1
+_TOKEN = re.compile(r"\w+")
+
+
+def _tokens(text: Optional[str]) -> List[str]:
+    return [t for t in _TOKEN.findall((text or "").lower()) if t not in STOPWORDS]
+
+
+class DuplicateDetector:
+    """MinHash/LSH index of active jobs for spotting re-posted recruitment notices.
+
+    A job's features are its title and organization words plus the leading
+    description words, so word order and filler ("Online Form", "Posts")
+    don't matter. Each job gets a ``num_perm``-value MinHash signature split
+    into ``bands`` bands; jobs sharing any band bucket are candidates. A
+    candidate is a duplicate when the estimated Jaccard similarity of the
+    signatures reaches ``threshold`` and the exact Jaccard similarity of the
+    title words reaches ``title_threshold`` (which keeps sibling notices from
+    one organization, like "SSC CGL 2025" and "SSC CHSL 2025", apart).
+    """
+
+    def __init__(
+        self,
+        num_perm: int = 64,
+        bands: int = 16,
+        threshold: float = 0.5,
+        title_threshold: float = 0.6,
+        seed: int = 7,
+    ):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.threshold = threshold
+        self.title_threshold = title_threshold
+        self.seed = seed
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _MERSENNE_PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self._b = rng.integers(0, _MERSENNE_PRIME, size=(num_perm, 1), dtype=np.uint64)
+        self._db: Optional[AsyncIOMotorClient] = None
+        self.clear()
+
+    def clear(self):
+        self._signatures: Dict[str, np.ndarray] = {}
+        self._titles: Dict[str, frozenset] = {}
+        self._buckets: List[Dict[bytes, Set[str]]] = [{} for _ in range(self.bands)]
+
+    async def load(self, db: AsyncIOMotorClient):
+        """Index every active job."""
+        self._db = db
+        self.clear()
+        projection = {"id": 1, "title": 1, "organization": 1, "description": 1}
+        async for job in db.jobs.find({"status": JobStatus.ACTIVE.value}, projection):
+            self._add(job, self.signature(job))
+
+    def signature(self, job: Dict[str, Any]) -> np.ndarray:
+        features = set(_tokens(job.get("title")))
+        features.update(f"o:{t}" for t in _tokens(job.get("organization")))
+        features.update(f"d:{t}" for t in _tokens(job.get("description"))[:MAX_DESCRIPTION_TOKENS])
+        if not features:
+            features = {""}
+        hashes = np.fromiter((zlib.crc32(f.encode()) for f in features), dtype=np.uint64, count=len(features))
+        return ((self._a * hashes + self._b) % _MERSENNE_PRIME).min(axis=1)
+
+    def find_duplicate(self, job: Dict[str, Any]) -> Optional[Tuple[str, float]]:
+        """Return ``(job_id, similarity)`` of the closest indexed duplicate, if any."""
+        return self._best_match(job, self.signature(job))
+
+    def upsert(self, job: Dict[str, Any]):
+        self.remove(job["id"])
+        if str(getattr(job.get("status"), "value", job.get("status"))) == JobStatus.ACTIVE.value:
+            self._add(job, self.signature(job))
+
+    def remove(self, job_id: str):
+        signature = self._signatures.pop(job_id, None)
+        if signature is None:
+            return
+        del self._titles[job_id]
+        for band, key in enumerate(self._band_keys(signature)):
+            bucket = self._buckets[band].get(key)
+            if bucket is not None:
+                bucket.discard(job_id)
+                if not bucket:
+                    del self._buckets[band][key]
+
+    def remove_many(self, job_ids: List[str]):
+        for job_id in job_ids:
+            self.remove(job_id)
+
+    async def apply_change(self, event: ChangeEvent):
+        """Change feed consumer for the ``jobs`` collection; ``invalidate`` reloads the index."""
+        if event.operation == "invalidate":
+            if self._db is not None:
+                await self.load(self._db)
+            else:
+                self.clear()
+        elif event.document is not None:
+            self.upsert(event.document)
+        elif event.document_id is not None:
+            self.remove(event.document_id)
+
+    async def backfill(self, db: AsyncIOMotorClient, mark: bool = False) -> List[Dict[str, Any]]:
+        """Scan active jobs oldest first and report each one that duplicates an earlier job.
+
+        With ``mark=True`` the later posting gets ``duplicate_of`` set in the
+        database. Runs on a private index, so the live one is untouched.
+        """
+        scanner = DuplicateDetector(self.num_perm, self.bands, self.threshold, self.title_threshold, self.seed)
+        projection = {"id": 1, "title": 1, "organization": 1, "description": 1}
+        duplicates = []
+        async for job in db.jobs.find({"status": JobStatus.ACTIVE.value}, projection).sort("created_at", 1):
+            signature = scanner.signature(job)
+            match = scanner._best_match(job, signature)
+            if match:
+                duplicates.append({"job_id": job["id"], "duplicate_of": match[0], "similarity": round(match[1], 3)})
+            scanner._add(job, signature)
+
+        if mark and duplicates:
+            await db.jobs.bulk_write(
+                [UpdateOne({"id": d["job_id"]}, {"$set": {"duplicate_of": d["duplicate_of"]}}) for d in duplicates],
+                ordered=False,
+            )
+        return duplicates
+
+    def _add(self, job: Dict[str, Any], signature: np.ndarray):
+        job_id = job["id"]
+        self._signatures[job_id] = signature
+        self._titles[job_id] = frozenset(_tokens(job.get("title")))
+        for band, key in enumerate(self._band_keys(signature)):
+            self._buckets[band].setdefault(key, set()).add(job_id)
+
+    def _best_match(self, job: Dict[str, Any], signature: np.ndarray) -> Optional[Tuple[str, float]]:
+        candidates: Set[str] = set()
+        for band, key in enumerate(self._band_keys(signature)):
+            candidates |= self._buckets[band].get(key, set())
+        candidates.discard(job.get("id"))
+
+        title = frozenset(_tokens(job.get("title")))
+        best = None
+        for candidate in candidates:
+            similarity = float(np.count_nonzero(self._signatures[candidate] == signature)) / self.num_perm
+            if similarity < self.threshold or (best is not None and similarity <= best[1]):
+                continue
+            other_title = self._titles[candidate]
+            union = len(title | other_title)
+            if union and len(title & other_title) / union >= self.title_threshold:
+                best = (candidate, similarity)
+        return best
+
+    def _band_keys(self, signature: np.ndarray) -> List[bytes]:
+        return [signature[i * self.rows:(i + 1) * self.rows].tobytes() for i in range(self.bands)]
+
+
+# Global duplicate detector instance
+job_duplicates = DuplicateDetector()
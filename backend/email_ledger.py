@@ -0,0 +1,182 @@
+import hashlib
+import math
+import os
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Set
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import BulkWriteError
+import logging
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY = 11000
+
+# Message kinds recorded in the ledger
+WELCOME = "welcome"
+JOB_ALERT = "job_alert"
+APPLICATION_CONFIRMATION = "application_confirmation"
+
+# Ledger entry states
+CLAIMED = "claimed"
+SENT = "sent"
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings (no false negatives, tunable false positives)."""
+
+    def __init__(self, capacity: int, error_rate: float = 0.01):
+        self.capacity = capacity
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.clear()
+
+    def clear(self):
+        self._bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def add(self, key: str):
+        for position in self._positions(key):
+            self._bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    def _positions(self, key: str) -> List[int]:
+        # Double hashing: k positions from the two halves of one digest
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        return [(h1 + i * h2) % self.size for i in range(self.hash_count)]
+
+
+class EmailLedger:
+    """Record of delivered emails, keyed by (user, message kind, job ID).
+
+    Each delivery is one tiny document in ``email_deliveries`` whose ``_id``
+    is ``"<user_id>:<kind>:<job_id>"``. Before a fan-out batch is sent,
+    ``claim`` records every recipient at once with an unordered
+    ``insert_many`` in the ``claimed`` state: recipients already in the
+    ledger fail with a duplicate key and are left out, so retries, reruns
+    and concurrent workers never send the same message twice. Successful
+    sends are flipped to ``sent`` with ``mark_sent``. A TTL index on
+    ``expires_at`` forgets sent entries after ``ttl_days`` and claims after
+    ``claim_seconds``, so a claim left behind by a crash mid-send can be
+    taken over and retried.
+
+    An in-memory Bloom filter of known keys sits in front of the store.
+    Keys it has never seen go straight to the insert; only the (usually
+    few) keys it reports as seen are confirmed with one ``$in`` query, and
+    those really delivered are dropped without a write.
+    """
+
+    def __init__(
+        self,
+        ttl_days: int = 30,
+        claim_seconds: int = 900,
+        bloom_capacity: int = 2_000_000,
+        bloom_error_rate: float = 0.01,
+    ):
+        self.ttl_days = ttl_days
+        self.claim_seconds = claim_seconds
+        self.bloom = BloomFilter(bloom_capacity, bloom_error_rate)
+
+    @staticmethod
+    def key(user_id: str, kind: str, job_id: Optional[str] = None) -> str:
+        return f"{user_id}:{kind}:{job_id or '-'}"
+
+    async def ensure_indexes(self, db: AsyncIOMotorClient):
+        await db.email_deliveries.create_index("expires_at", expireAfterSeconds=0)
+
+    async def load(self, db: AsyncIOMotorClient):
+        """Fill the Bloom filter from the ledger."""
+        self.bloom.clear()
+        async for delivery in db.email_deliveries.find({}, {"_id": 1}, batch_size=10000):
+            self.bloom.add(delivery["_id"])
+        if self.bloom.count > self.bloom.capacity:
+            logger.warning(
+                f"Email ledger holds {self.bloom.count} entries, over the Bloom filter capacity "
+                f"of {self.bloom.capacity}; raise EMAIL_LEDGER_BLOOM_CAPACITY"
+            )
+
+    async def claim(self, db: AsyncIOMotorClient, keys: Iterable[str]) -> Set[str]:
+        """Claim ``keys`` for sending and return those nobody sent or is sending.
+
+        Callers send only to the returned keys, then ``mark_sent`` the ones
+        that went out and ``release`` the rest.
+        """
+        keys = list(dict.fromkeys(keys))
+        now = datetime.utcnow()
+        maybe_known = [key for key in keys if key in self.bloom]
+        known: Set[str] = set()
+        stale: List[str] = []
+        if maybe_known:
+            async for delivery in db.email_deliveries.find(
+                {"_id": {"$in": maybe_known}}, {"_id": 1, "state": 1, "expires_at": 1}
+            ):
+                known.add(delivery["_id"])
+                if self._is_stale_claim(delivery, now):
+                    stale.append(delivery["_id"])
+        candidates = [key for key in keys if key not in known]
+
+        claimed = set(candidates)
+        if candidates:
+            try:
+                await db.email_deliveries.insert_many(
+                    [self._claim_document(key, now) for key in candidates], ordered=False
+                )
+            except BulkWriteError as e:
+                errors = e.details.get("writeErrors", [])
+                if any(error["code"] != DUPLICATE_KEY for error in errors):
+                    raise
+                # Sent by an earlier run or claimed by another worker
+                conflicts = [candidates[error["index"]] for error in errors]
+                claimed -= set(conflicts)
+                stale.extend(conflicts)
+            for key in candidates:
+                self.bloom.add(key)
+
+        # Claims the TTL monitor hasn't removed yet can be taken over
+        for key in stale:
+            taken = await db.email_deliveries.update_one(
+                {"_id": key, "state": CLAIMED, "expires_at": {"$lte": now}},
+                {"$set": self._claim_document(key, now)},
+            )
+            if taken.modified_count:
+                claimed.add(key)
+        return claimed
+
+    async def mark_sent(self, db: AsyncIOMotorClient, keys: List[str]):
+        """Turn claims into delivery records once their email went out."""
+        if keys:
+            now = datetime.utcnow()
+            await db.email_deliveries.update_many(
+                {"_id": {"$in": keys}, "state": CLAIMED},
+                {"$set": {"state": SENT, "sent_at": now, "expires_at": now + timedelta(days=self.ttl_days)}},
+            )
+
+    async def release(self, db: AsyncIOMotorClient, keys: List[str]):
+        """Drop claims whose email couldn't be sent, so a later attempt may send it."""
+        if keys:
+            await db.email_deliveries.delete_many({"_id": {"$in": keys}, "state": CLAIMED})
+
+    def _claim_document(self, key: str, now: datetime) -> dict:
+        return {
+            "_id": key,
+            "state": CLAIMED,
+            "claimed_at": now,
+            "expires_at": now + timedelta(seconds=self.claim_seconds),
+        }
+
+    @staticmethod
+    def _is_stale_claim(delivery: dict, now: datetime) -> bool:
+        expires_at = delivery.get("expires_at")
+        return delivery.get("state") == CLAIMED and expires_at is not None and expires_at <= now
+
+
+# Global email ledger instance
+email_ledger = EmailLedger(
+    ttl_days=int(os.getenv("EMAIL_LEDGER_TTL_DAYS", "30")),
+    claim_seconds=int(os.getenv("EMAIL_LEDGER_CLAIM_SECONDS", "900")),
+    bloom_capacity=int(os.getenv("EMAIL_LEDGER_BLOOM_CAPACITY", "2000000")),
+)
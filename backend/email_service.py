@@ -1,3 +1,4 @@
+import asyncio
 import os
 from typing import List
 from datetime import datetime
@@ -12,7 +13,19 @@ class EmailService:
     def __init__(self):
         self.api_key = os.getenv("SENDGRID_API_KEY")
         self.from_email = os.getenv("FROM_EMAIL", "noreply@governmentjobportal.com")
-        self.sg = SendGridAPIClient(api_key=self.api_key) if self.api_key else None
+        self._sg = None
+    
+    @property
+    def enabled(self) -> bool:
+        """Whether SendGrid is configured, i.e. whether sends can succeed at all."""
+        return bool(self.api_key)
+    
+    @property
+    def sg(self):
+        """SendGrid client, created on first use rather than at import time."""
+        if self._sg is None and self.api_key:
+            self._sg = SendGridAPIClient(api_key=self.api_key)
+        return self._sg
         
     async def send_email(self, to_email: str, subject: str, content: str) -> bool:
         """Send email using SendGrid."""
@@ -28,7 +41,8 @@ class EmailService:
                 html_content=Content("text/html", content)
             )
             
-            response = self.sg.send(message)
+            # The SendGrid client is blocking; keep it off the event loop
+            response = await asyncio.to_thread(self.sg.send, message)
             return response.status_code == 202
             
         except Exception as e:
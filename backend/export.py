@@ -0,0 +1,125 @@
+import csv
+import io
+import json
+from typing import Any, AsyncIterator, Dict, List
+from motor.motor_asyncio import AsyncIOMotorClient
+
+EXPORT_FORMATS = ("csv", "jsonl")
+MEDIA_TYPES = {"csv": "text/csv", "jsonl": "application/x-ndjson"}
+# Leading characters that make spreadsheet apps evaluate a cell as a formula
+FORMULA_PREFIXES = ("=", "+", "-", "@", "\t", "\r")
+
+APPLICATION_USER_FIELDS = ["full_name", "email", "phone", "location", "education_level"]
+APPLICATION_COLUMNS = ["application_id", "job_id", "user_id", "status", "applied_at"] + APPLICATION_USER_FIELDS
+USER_COLUMNS = [
+    "id", "email", "full_name", "phone", "location", "education_level",
+    "preferred_job_categories", "role", "is_active", "email_verified", "created_at", "last_login",
+]
+
+
+async def stream_job_applications(
+    db: AsyncIOMotorClient,
+    job_id: str,
+    export_format: str = "csv",
+    batch_size: int = 1000,
+    collection: str = "applications",
+) -> AsyncIterator[str]:
+    """Yield a job's applications joined with applicant details, one chunk per batch.
+
+    Applicants are fetched with a single ``$in`` query per batch, so memory
+    use depends on ``batch_size`` only, never on the number of applications.
+    """
+    if export_format == "csv":
+        yield _csv_header(APPLICATION_COLUMNS)
+
+    projection = {"_id": 0, "id": 1, "job_id": 1, "user_id": 1, "status": 1, "applied_at": 1}
+    cursor = db[collection].find({"job_id": job_id}, projection, batch_size=batch_size)
+    batch: List[Dict[str, Any]] = []
+    async for application in cursor:
+        batch.append(application)
+        if len(batch) == batch_size:
+            yield _render(await _join_applicants(db, batch), APPLICATION_COLUMNS, export_format)
+            batch = []
+    if batch:
+        yield _render(await _join_applicants(db, batch), APPLICATION_COLUMNS, export_format)
+
+
+async def stream_users(
+    db: AsyncIOMotorClient,
+    export_format: str = "csv",
+    batch_size: int = 1000,
+) -> AsyncIterator[str]:
+    """Yield every user (without credentials), one chunk per batch."""
+    if export_format == "csv":
+        yield _csv_header(USER_COLUMNS)
+
+    projection = {"_id": 0, **{column: 1 for column in USER_COLUMNS}}
+    cursor = db.users.find({}, projection, batch_size=batch_size)
+    batch: List[Dict[str, Any]] = []
+    async for user in cursor:
+        batch.append(user)
+        if len(batch) == batch_size:
+            yield _render(batch, USER_COLUMNS, export_format)
+            batch = []
+    if batch:
+        yield _render(batch, USER_COLUMNS, export_format)
+
+
+async def _join_applicants(db: AsyncIOMotorClient, applications: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    user_ids = list({application["user_id"] for application in applications})
+    projection = {"_id": 0, "id": 1, **{field: 1 for field in APPLICATION_USER_FIELDS}}
+    users = {
+        user["id"]: user
+        async for user in db.users.find({"id": {"$in": user_ids}}, projection)
+    }
+
+    rows = []
+    for application in applications:
+        user = users.get(application["user_id"], {})
+        row = {
+            "application_id": application.get("id"),
+            "job_id": application.get("job_id"),
+            "user_id": application.get("user_id"),
+            "status": application.get("status"),
+            "applied_at": application.get("applied_at"),
+        }
+        row.update({field: user.get(field) for field in APPLICATION_USER_FIELDS})
+        rows.append(row)
+    return rows
+
+
+def _csv_header(columns: List[str]) -> str:
+    buffer = io.StringIO()
+    csv.writer(buffer).writerow(columns)
+    return buffer.getvalue()
+
+
+def _render(rows: List[Dict[str, Any]], columns: List[str], export_format: str) -> str:
+    if export_format == "jsonl":
+        return "".join(json.dumps({column: row.get(column) for column in columns}, default=_json_value) + "\n" for row in rows)
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow([_csv_value(row.get(column)) for column in columns])
+    return buffer.getvalue()
+
+
+def _json_value(value: Any) -> Any:
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, list):
+        value = ";".join(str(getattr(item, "value", item)) for item in value)
+    elif hasattr(value, "isoformat"):
+        return value.isoformat()
+    value = getattr(value, "value", value)
+    # User-supplied text is quoted so it can't run as a formula when opened
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
@@ -0,0 +1,163 @@
+from typing import Any, Dict, List, Optional
+from motor.motor_asyncio import AsyncIOMotorClient
+from models import JobStatus
+from change_feed import ChangeEvent
+
+# (lower bound inclusive, upper bound exclusive, bucket name) on salary_min
+SALARY_BUCKETS = [
+    (0, 20000, "under_20k"),
+    (20000, 40000, "20k_40k"),
+    (40000, 70000, "40k_70k"),
+    (70000, None, "70k_plus"),
+]
+SALARY_NOT_SPECIFIED = "not_specified"
+
+FACET_FIELDS = ("category", "state", "min_education", "salary")
+
+
+def salary_bucket(salary_min: Optional[float]) -> str:
+    """Map a starting salary to its facet bucket name."""
+    if salary_min is None:
+        return SALARY_NOT_SPECIFIED
+    for lower, upper, name in SALARY_BUCKETS:
+        if salary_min >= lower and (upper is None or salary_min < upper):
+            return name
+    return SALARY_NOT_SPECIFIED
+
+
+class FacetIndex:
+    """In-memory facet counts over active jobs, kept as one bitmap per facet value.
+
+    Every active job owns a bit position (slots are reused after a job
+    leaves the index). A facet value's bitmap is a Python ``int`` with the
+    bits of the jobs having that value, so counts under a set of filters are
+    a few ANDs and ``bit_count`` calls and never touch the database.
+    """
+
+    def __init__(self):
+        self._db: Optional[AsyncIOMotorClient] = None
+        self.clear()
+
+    def clear(self):
+        self._slots: Dict[str, int] = {}
+        self._free_slots: List[int] = []
+        self._next_slot = 0
+        self._job_values: Dict[str, Dict[str, str]] = {}
+        self._bitmaps: Dict[str, Dict[str, int]] = {field: {} for field in FACET_FIELDS}
+        self._labels: Dict[str, Dict[str, str]] = {field: {} for field in FACET_FIELDS}
+        self._all = 0
+
+    async def load(self, db: AsyncIOMotorClient):
+        """Rebuild the index from the active jobs in the database."""
+        self._db = db
+        self.clear()
+        projection = {"id": 1, "status": 1, "category": 1, "state": 1, "min_education": 1, "salary_min": 1}
+        async for job in db.jobs.find({"status": JobStatus.ACTIVE.value}, projection):
+            self.upsert(job)
+
+    def upsert(self, job: Dict[str, Any]):
+        """Add, move or remove a job depending on its current fields and status."""
+        job_id = job["id"]
+        if self._value(job.get("status")) != JobStatus.ACTIVE.value:
+            self.remove(job_id)
+            return
+
+        values = {
+            "category": self._value(job.get("category")),
+            "state": (job.get("state") or "").strip(),
+            "min_education": self._value(job.get("min_education")),
+            "salary": salary_bucket(job.get("salary_min")),
+        }
+        if self._job_values.get(job_id) == values:
+            return
+
+        self.remove(job_id)
+        slot = self._free_slots.pop() if self._free_slots else self._allocate_slot()
+        bit = 1 << slot
+        self._slots[job_id] = slot
+        self._job_values[job_id] = values
+        self._all |= bit
+        for field, label in values.items():
+            key = label.lower()
+            self._labels[field].setdefault(key, label)
+            self._bitmaps[field][key] = self._bitmaps[field].get(key, 0) | bit
+
+    def remove(self, job_id: str):
+        """Drop a job from the index (no-op if it isn't indexed)."""
+        slot = self._slots.pop(job_id, None)
+        if slot is None:
+            return
+        mask = ~(1 << slot)
+        self._all &= mask
+        for field, label in self._job_values.pop(job_id).items():
+            key = label.lower()
+            remaining = self._bitmaps[field][key] & mask
+            if remaining:
+                self._bitmaps[field][key] = remaining
+            else:
+                del self._bitmaps[field][key]
+                del self._labels[field][key]
+        self._free_slots.append(slot)
+
+    def remove_many(self, job_ids: List[str]):
+        for job_id in job_ids:
+            self.remove(job_id)
+
+    async def apply_change(self, event: ChangeEvent):
+        """Change feed consumer for the ``jobs`` collection.
+
+        An ``invalidate`` means events were missed, so the index is rebuilt
+        from the database it was loaded from.
+        """
+        if event.operation == "invalidate":
+            if self._db is not None:
+                await self.load(self._db)
+            else:
+                self.clear()
+        elif event.document is not None:
+            self.upsert(event.document)
+        elif event.document_id is not None:
+            self.remove(event.document_id)
+
+    def counts(self, filters: Dict[str, Optional[str]]) -> Dict[str, Any]:
+        """Return the total and per-value counts under the applied ``filters``.
+
+        Each facet's counts ignore that facet's own filter, so the sidebar can
+        show how many results selecting another value would give.
+        """
+        filter_bitmaps = {
+            field: self._bitmaps[field].get(value.strip().lower(), 0)
+            for field, value in filters.items()
+            if value
+        }
+
+        total_bitmap = self._all
+        for bitmap in filter_bitmaps.values():
+            total_bitmap &= bitmap
+
+        facets = {}
+        for field in FACET_FIELDS:
+            base = self._all
+            for other_field, bitmap in filter_bitmaps.items():
+                if other_field != field:
+                    base &= bitmap
+            facets[field] = {
+                self._labels[field][key]: count
+                for key, bitmap in self._bitmaps[field].items()
+                if (count := (bitmap & base).bit_count())
+            }
+
+        return {"total": total_bitmap.bit_count(), "facets": facets}
+
+    def _allocate_slot(self) -> int:
+        slot = self._next_slot
+        self._next_slot += 1
+        return slot
+
+    @staticmethod
+    def _value(value: Any) -> str:
+        return str(getattr(value, "value", value) or "")
+
+
+# Global facet index instance
+job_facets = FacetIndex()
@@ -0,0 +1,180 @@
+import math
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from models import JobStatus
+from change_feed import ChangeEvent
+
+SCORING_FIELDS = {
+    "id": 1, "category": 1, "min_education": 1, "state": 1, "location": 1,
+    "views": 1, "applications_count": 1, "created_at": 1,
+}
+PROFILE_FIELDS = ("preferred_job_categories", "education_level", "location")
+USER_FIELDS = {"id": 1, **{field: 1 for field in PROFILE_FIELDS}}
+
+
+def _profile(user: Dict[str, Any]) -> Dict[str, Any]:
+    return {field: user.get(field) for field in PROFILE_FIELDS}
+
+
+class FeedBuilder:
+    """Materialized, ranked per-user lists of active job IDs.
+
+    Each user's feed is one document in ``feeds`` holding at most
+    ``feed_size`` ``{job_id, score}`` entries, highest score first. A score
+    combines recency (``recency_points`` for a new job, halving every
+    ``recency_half_life``), popularity (views and applications) and bonuses
+    for matching the user's preferred categories (3), education level (2)
+    and location (1), so a matching job stays ahead of newer unrelated ones
+    for a few days. Scores are relative to the time the feed was built.
+    Feeds are built lazily on first read and rebuilt once older than
+    ``max_age`` or half emptied by closed jobs. A new job is scored against
+    the profile and build time stored with each existing feed and pushed
+    with ``$push`` + ``$sort`` + ``$slice`` where it makes the cut; closed
+    or deleted jobs are ``$pull``-ed. Jobs flagged ``duplicate_of`` are
+    never candidates.
+    """
+
+    def __init__(
+        self,
+        feed_size: int = 100,
+        candidate_limit: int = 500,
+        fanout_batch_size: int = 1000,
+        max_age: timedelta = timedelta(hours=24),
+        recency_points: float = 5.0,
+        recency_half_life: timedelta = timedelta(days=3),
+    ):
+        self.feed_size = feed_size
+        self.candidate_limit = candidate_limit
+        self.fanout_batch_size = fanout_batch_size
+        self.max_age = max_age
+        self.recency_points = recency_points
+        self.recency_half_life = recency_half_life
+
+    async def ensure_indexes(self, db: AsyncIOMotorClient):
+        await db.feeds.create_index("user_id", unique=True)
+        await db.feeds.create_index("entries.job_id")
+
+    def score(self, user: Dict[str, Any], job: Dict[str, Any], now: Optional[datetime] = None) -> float:
+        now = now or datetime.utcnow()
+        age = max(timedelta(0), now - (job.get("created_at") or now))
+        score = self.recency_points * 0.5 ** (age / self.recency_half_life)
+        score += 0.5 * math.log1p(job.get("views") or 0) + math.log1p(job.get("applications_count") or 0)
+
+        category = getattr(job.get("category"), "value", job.get("category"))
+        if category in (user.get("preferred_job_categories") or []):
+            score += 3
+        education = getattr(job.get("min_education"), "value", job.get("min_education"))
+        if education and education == user.get("education_level"):
+            score += 2
+        location = (user.get("location") or "").strip().lower()
+        if location and location in ((job.get("state") or "").lower(), (job.get("location") or "").lower()):
+            score += 1
+        return round(score, 4)
+
+    async def get_job_ids(self, db: AsyncIOMotorClient, user_id: str) -> List[str]:
+        """Return the user's ranked job IDs, (re)building the feed when it is missing or stale."""
+        feed = await db.feeds.find_one({"user_id": user_id}, {"entries": 1, "built_at": 1, "built_size": 1})
+        if self._needs_rebuild(feed):
+            entries = await self.build(db, user_id)
+        else:
+            entries = feed["entries"]
+        return [entry["job_id"] for entry in entries]
+
+    def _needs_rebuild(self, feed: Optional[Dict[str, Any]]) -> bool:
+        if feed is None or feed.get("built_at") is None:
+            return True
+        if datetime.utcnow() - feed["built_at"] > self.max_age:
+            return True
+        # Mostly emptied by closed jobs; a feed built short stays until it ages out
+        return len(feed["entries"]) < feed.get("built_size", 0) // 2
+
+    async def build(self, db: AsyncIOMotorClient, user_id: str) -> List[Dict[str, Any]]:
+        """Rank candidate active jobs for a user and store the top ``feed_size``."""
+        user = await db.users.find_one({"id": user_id}, USER_FIELDS) or {}
+        categories = user.get("preferred_job_categories") or []
+
+        # Newest jobs overall, plus newest in the user's categories; re-posts are left out
+        active = {"status": JobStatus.ACTIVE.value, "duplicate_of": None}
+        candidate_queries = [active]
+        if categories:
+            candidate_queries.append({**active, "category": {"$in": categories}})
+        candidates: Dict[str, Dict[str, Any]] = {}
+        for query in candidate_queries:
+            async for job in db.jobs.find(query, SCORING_FIELDS).sort("created_at", -1).limit(self.candidate_limit):
+                candidates[job["id"]] = job
+
+        built_at = datetime.utcnow()
+        entries = sorted(
+            ({"job_id": job_id, "score": self.score(user, job, built_at)} for job_id, job in candidates.items()),
+            key=lambda entry: entry["score"],
+            reverse=True,
+        )[:self.feed_size]
+        await db.feeds.update_one(
+            {"user_id": user_id},
+            {"$set": {
+                "entries": entries,
+                "built_size": len(entries),
+                "profile": _profile(user),
+                "built_at": built_at,
+            }},
+            upsert=True,
+        )
+        return entries
+
+    async def add_job(self, db: AsyncIOMotorClient, job: Dict[str, Any]):
+        """Push a new job into every existing feed it would rank in.
+
+        Each feed is scored with the profile and time it was built for, so
+        the result matches what ``build`` would produce. Full feeds whose last entry
+        outscores the job are skipped by the update filter; missing feeds
+        are built on first read.
+        """
+        last = f"entries.{self.feed_size - 1}"
+        operations = []
+        projection = {"user_id": 1, "profile": 1, "built_at": 1}
+        async for feed in db.feeds.find({}, projection, batch_size=self.fanout_batch_size):
+            score = self.score(feed.get("profile") or {}, job, feed.get("built_at"))
+            operations.append(UpdateOne(
+                {"user_id": feed["user_id"], "$or": [{last: {"$exists": False}}, {f"{last}.score": {"$lt": score}}]},
+                {"$push": {"entries": {
+                    "$each": [{"job_id": job["id"], "score": score}],
+                    "$sort": {"score": -1},
+                    "$slice": self.feed_size,
+                }}},
+            ))
+            if len(operations) == self.fanout_batch_size:
+                await db.feeds.bulk_write(operations, ordered=False)
+                operations = []
+        if operations:
+            await db.feeds.bulk_write(operations, ordered=False)
+
+    async def remove_jobs(self, db: AsyncIOMotorClient, job_ids: List[str]):
+        """Remove closed or deleted jobs from every feed that contains them."""
+        if job_ids:
+            await db.feeds.update_many(
+                {"entries.job_id": {"$in": job_ids}},
+                {"$pull": {"entries": {"job_id": {"$in": job_ids}}}},
+            )
+
+    async def apply_user_change(self, db: AsyncIOMotorClient, event: ChangeEvent):
+        """Change feed consumer for ``users``: drop a feed built for an outdated profile.
+
+        Other user updates (logins and the like) leave the feed alone; a
+        dropped feed is rebuilt on the user's next read.
+        """
+        if event.document is not None:
+            await db.feeds.delete_one({
+                "user_id": event.document_id,
+                "profile": {"$ne": _profile(event.document)},
+            })
+
+
+# Global feed builder instance
+feed_builder = FeedBuilder(
+    feed_size=int(os.getenv("FEED_SIZE", "100")),
+    max_age=timedelta(hours=float(os.getenv("FEED_MAX_AGE_HOURS", "24"))),
+    recency_half_life=timedelta(days=float(os.getenv("FEED_RECENCY_HALF_LIFE_DAYS", "3"))),
+)
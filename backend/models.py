@@ -30,6 +30,7 @@ class User(UserBase):
     is_active: bool = True
     email_verified: bool = False
     created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
     last_login: Optional[datetime] = None
     notification_preferences: Dict[str, bool] = {
         "email_alerts": True,
@@ -110,6 +111,7 @@ class Job(JobBase):
     created_at: datetime = Field(default_factory=datetime.utcnow)
     updated_at: datetime = Field(default_factory=datetime.utcnow)
     created_by: str  # Admin user ID
+    duplicate_of: Optional[str] = None  # ID of the earlier posting of the same notice
 
 class JobResponse(JobBase):
     id: str
@@ -118,6 +120,7 @@ class JobResponse(JobBase):
     applications_count: int
     created_at: datetime
     updated_at: datetime
+    duplicate_of: Optional[str] = None
 
 class JobUpdate(BaseModel):
     title: Optional[str] = None
@@ -160,6 +163,14 @@ class Notification(NotificationBase):
     is_read: bool = False
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
+class NotificationPage(BaseModel):
+    items: List[Notification]
+    next_cursor: Optional[str] = None
+    unread_count: int
+
+class NotificationMarkRead(BaseModel):
+    notification_ids: Optional[List[str]] = None  # If None, mark the whole inbox as read
+
 # Application Models
 class ApplicationStatus(str, Enum):
     APPLIED = "applied"
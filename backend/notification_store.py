@@ -0,0 +1,232 @@
+import base64
+from datetime import datetime
+from typing import List, Optional, Tuple
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING, ReturnDocument, UpdateOne
+from models import Notification, NotificationCreate
+
+
+class NotificationStore:
+    """Per-user inbox combining targeted and broadcast notifications.
+
+    Targeted notifications are fanned out on write (one document per
+    recipient in ``notifications``). Broadcasts (``user_ids == []``) are
+    stored once in ``broadcast_notifications`` with a monotonically increasing
+    ``seq`` and fanned out on read. Each user has a small state document in
+    ``notification_state`` holding a counter of unread targeted notifications,
+    a ``broadcast_seen_seq`` watermark (every broadcast up to it is read) and
+    ``broadcast_read_seqs``, the few broadcasts above the watermark read
+    individually. The unread count is ``unread + (latest broadcast seq -
+    watermark - len(broadcast_read_seqs))`` without scanning anything.
+    """
+
+    SEQ_COUNTER_ID = "broadcast_notification_seq"
+
+    async def ensure_indexes(self, db: AsyncIOMotorClient):
+        """Create the indexes backing inbox pagination and counters."""
+        await db.notifications.create_index(
+            [("user_id", ASCENDING), ("created_at", DESCENDING), ("id", DESCENDING)]
+        )
+        await db.broadcast_notifications.create_index([("created_at", DESCENDING), ("id", DESCENDING)])
+        await db.broadcast_notifications.create_index("seq", unique=True)
+        await db.notification_state.create_index("user_id", unique=True)
+
+    async def init_user(self, db: AsyncIOMotorClient, user_id: str):
+        """Create the user's state so broadcasts sent before signup don't count as unread.
+
+        The counter starts from the user's unread targeted notifications, so
+        ones stored before the state existed are counted (and can be read).
+        """
+        current_seq = await self._current_broadcast_seq(db)
+        unread = await db.notifications.count_documents({"user_id": user_id, "is_read": False})
+        await db.notification_state.update_one(
+            {"user_id": user_id},
+            {"$setOnInsert": {"unread": unread, "broadcast_seen_seq": current_seq}},
+            upsert=True,
+        )
+
+    async def create(self, db: AsyncIOMotorClient, notification_data: NotificationCreate) -> int:
+        """Store a notification and return the number of recipients (0 for a broadcast)."""
+        fields = notification_data.dict(exclude={"user_ids"})
+        if not notification_data.user_ids:
+            seq_doc = await db.counters.find_one_and_update(
+                {"_id": self.SEQ_COUNTER_ID},
+                {"$inc": {"value": 1}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER,
+            )
+            broadcast = Notification(user_id="*", **fields).dict(exclude={"user_id", "is_read"})
+            broadcast["seq"] = seq_doc["value"]
+            await db.broadcast_notifications.insert_one(broadcast)
+            return 0
+
+        user_ids = list(dict.fromkeys(notification_data.user_ids))
+        # Seed missing states first so their counters include older notifications
+        known = {
+            state["user_id"]
+            async for state in db.notification_state.find({"user_id": {"$in": user_ids}}, {"user_id": 1})
+        }
+        for user_id in user_ids:
+            if user_id not in known:
+                await self.init_user(db, user_id)
+        await db.notifications.insert_many(
+            [Notification(user_id=user_id, **fields).dict() for user_id in user_ids],
+            ordered=False,
+        )
+        current_seq = await self._current_broadcast_seq(db)
+        await db.notification_state.bulk_write(
+            [
+                UpdateOne(
+                    {"user_id": user_id},
+                    {"$inc": {"unread": 1}, "$setOnInsert": {"broadcast_seen_seq": current_seq}},
+                    upsert=True,
+                )
+                for user_id in user_ids
+            ],
+            ordered=False,
+        )
+        return len(user_ids)
+
+    async def unread_count(self, db: AsyncIOMotorClient, user_id: str) -> int:
+        """Return the user's unread count from the counter and watermark."""
+        state = await self._get_state(db, user_id)
+        current_seq = await self._current_broadcast_seq(db)
+        unread_broadcasts = max(
+            0, current_seq - state.get("broadcast_seen_seq", 0) - len(state.get("broadcast_read_seqs", []))
+        )
+        return max(0, state.get("unread", 0)) + unread_broadcasts
+
+    async def list_inbox(
+        self,
+        db: AsyncIOMotorClient,
+        user_id: str,
+        limit: int = 20,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Notification], Optional[str]]:
+        """Return one page of the inbox (newest first) and the cursor for the next page.
+
+        Raises ``ValueError`` for a malformed cursor.
+        """
+        page_filter = {}
+        if cursor:
+            created_at, notification_id = self._decode_cursor(cursor)
+            page_filter = {
+                "$or": [
+                    {"created_at": {"$lt": created_at}},
+                    {"created_at": created_at, "id": {"$lt": notification_id}},
+                ]
+            }
+        sort = [("created_at", DESCENDING), ("id", DESCENDING)]
+
+        targeted = await db.notifications.find({"user_id": user_id, **page_filter}).sort(sort).limit(limit).to_list(length=limit)
+        broadcasts = await db.broadcast_notifications.find(page_filter).sort(sort).limit(limit).to_list(length=limit)
+
+        state = await self._get_state(db, user_id)
+        seen_seq = state.get("broadcast_seen_seq", 0)
+        read_seqs = set(state.get("broadcast_read_seqs", []))
+        for broadcast in broadcasts:
+            broadcast["user_id"] = user_id
+            broadcast["is_read"] = broadcast["seq"] <= seen_seq or broadcast["seq"] in read_seqs
+
+        merged = sorted(targeted + broadcasts, key=lambda n: (n["created_at"], n["id"]), reverse=True)[:limit]
+        items = [Notification(**notif) for notif in merged]
+
+        next_cursor = None
+        if len(items) == limit:
+            next_cursor = self._encode_cursor(items[-1].created_at, items[-1].id)
+        return items, next_cursor
+
+    async def mark_read(
+        self,
+        db: AsyncIOMotorClient,
+        user_id: str,
+        notification_ids: Optional[List[str]] = None,
+    ):
+        """Mark the given notifications (or the whole inbox when ``None``) as read.
+
+        Broadcasts read out of order are remembered individually until every
+        older broadcast is read too; then the watermark moves past them.
+        """
+        if notification_ids is None:
+            await db.notifications.update_many(
+                {"user_id": user_id, "is_read": False}, {"$set": {"is_read": True}}
+            )
+            current_seq = await self._current_broadcast_seq(db)
+            await db.notification_state.update_one(
+                {"user_id": user_id},
+                {"$set": {"unread": 0, "broadcast_read_seqs": []}, "$max": {"broadcast_seen_seq": current_seq}},
+                upsert=True,
+            )
+            return
+
+        result = await db.notifications.update_many(
+            {"user_id": user_id, "id": {"$in": notification_ids}, "is_read": False},
+            {"$set": {"is_read": True}},
+        )
+        update = {}
+        if result.modified_count:
+            update["$inc"] = {"unread": -result.modified_count}
+
+        state = await self._get_state(db, user_id)
+        read_seqs = [
+            broadcast["seq"]
+            async for broadcast in db.broadcast_notifications.find(
+                {"id": {"$in": notification_ids}, "seq": {"$gt": state.get("broadcast_seen_seq", 0)}}, {"seq": 1}
+            )
+        ]
+        if read_seqs:
+            update["$addToSet"] = {"broadcast_read_seqs": {"$each": read_seqs}}
+
+        if update:
+            await db.notification_state.update_one({"user_id": user_id}, update, upsert=True)
+        if read_seqs:
+            await self._advance_watermark(db, user_id)
+
+    async def _advance_watermark(self, db: AsyncIOMotorClient, user_id: str):
+        """Move the watermark over the broadcasts read in order and forget them individually."""
+        state = await self._get_state(db, user_id)
+        watermark = state.get("broadcast_seen_seq", 0)
+        read_seqs = set(state.get("broadcast_read_seqs", []))
+        if not read_seqs:
+            return
+        # Sequence numbers with no broadcast (a failed insert) never block the watermark
+        existing = {
+            broadcast["seq"]
+            async for broadcast in db.broadcast_notifications.find(
+                {"seq": {"$gt": watermark, "$lte": max(read_seqs)}}, {"seq": 1}
+            )
+        }
+        while watermark + 1 in read_seqs or (watermark < max(read_seqs) and watermark + 1 not in existing):
+            watermark += 1
+        if watermark > state.get("broadcast_seen_seq", 0):
+            await db.notification_state.update_one(
+                {"user_id": user_id},
+                {"$max": {"broadcast_seen_seq": watermark}, "$pull": {"broadcast_read_seqs": {"$lte": watermark}}},
+            )
+
+    async def _get_state(self, db: AsyncIOMotorClient, user_id: str) -> dict:
+        state = await db.notification_state.find_one({"user_id": user_id})
+        if state is None:
+            await self.init_user(db, user_id)
+            state = await db.notification_state.find_one({"user_id": user_id}) or {}
+        return state
+
+    async def _current_broadcast_seq(self, db: AsyncIOMotorClient) -> int:
+        counter = await db.counters.find_one({"_id": self.SEQ_COUNTER_ID})
+        return counter["value"] if counter else 0
+
+    @staticmethod
+    def _encode_cursor(created_at: datetime, notification_id: str) -> str:
+        raw = f"{created_at.isoformat()}|{notification_id}"
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    @staticmethod
+    def _decode_cursor(cursor: str) -> Tuple[datetime, str]:
+        """Decode a page cursor, raising ``ValueError`` if it is malformed."""
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, notification_id = raw.split("|", 1)
+        return datetime.fromisoformat(created_at), notification_id
+
+
+# Global notification store instance
+notification_store = NotificationStore()
@@ -0,0 +1,236 @@
+import asyncio
+import json
+import os
+import uuid
+from typing import Any, Dict, List, Optional, Set
+import logging
+
+logger = logging.getLogger(__name__)
+
+REDIS_CHANNEL = "job_portal:events"
+
+
+class Subscriber:
+    """One connected client with its filters and a bounded outgoing queue.
+
+    When the queue is full the ``drop_policy`` decides what happens:
+    ``drop_oldest`` discards the oldest pending event, ``drop_newest``
+    discards the incoming one and ``disconnect`` closes the subscription so a
+    stalled client cannot hold memory.
+    """
+
+    DROP_POLICIES = ("drop_oldest", "drop_newest", "disconnect")
+
+    def __init__(
+        self,
+        category: Optional[str] = None,
+        state: Optional[str] = None,
+        user_id: Optional[str] = None,
+        max_queue: int = 100,
+        drop_policy: str = "drop_oldest",
+    ):
+        if drop_policy not in self.DROP_POLICIES:
+            raise ValueError(f"Unknown drop policy: {drop_policy}")
+        self.category = getattr(category, "value", category)
+        self.state = state.lower() if state else None
+        self.user_id = user_id
+        self.drop_policy = drop_policy
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self.closed = False
+        self._closed_event = asyncio.Event()
+
+    def matches_job(self, category: Optional[str], state: Optional[str]) -> bool:
+        if self.category and self.category != category:
+            return False
+        if self.state and self.state != state:
+            return False
+        return True
+
+    def offer(self, message: str):
+        """Queue an already-encoded message without ever blocking the publisher."""
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(message)
+            return
+        except asyncio.QueueFull:
+            pass
+
+        self.dropped += 1
+        if self.drop_policy == "drop_oldest":
+            self.queue.get_nowait()
+            self.queue.put_nowait(message)
+        elif self.drop_policy == "disconnect":
+            self.close()
+
+    def close(self):
+        self.closed = True
+        self._closed_event.set()
+
+    async def next_message(self, timeout: float) -> Optional[str]:
+        """Return the next message, or ``None`` if nothing arrived within ``timeout``.
+
+        Raises ``ConnectionAbortedError`` once the subscription has been closed.
+        """
+        if not self.queue.empty():
+            return self.queue.get_nowait()
+        if self.closed:
+            raise ConnectionAbortedError("Subscription closed")
+
+        get_task = asyncio.ensure_future(self.queue.get())
+        closed_task = asyncio.ensure_future(self._closed_event.wait())
+        done, pending = await asyncio.wait(
+            {get_task, closed_task}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+        )
+        for task in pending:
+            task.cancel()
+        if get_task in done:
+            return get_task.result()
+        if closed_task in done:
+            raise ConnectionAbortedError("Subscription closed")
+        return None
+
+
+class EventBroker:
+    """In-process pub/sub for job and notification events.
+
+    Subscribers are indexed by category, state and user so a publish only
+    touches the clients that can match it. Messages are encoded once per
+    publish and shared by every recipient. When ``REDIS_URL`` is set, events
+    are also relayed through a Redis channel so clients connected to other
+    uvicorn workers receive them.
+    """
+
+    def __init__(self, redis_url: Optional[str] = None):
+        self.redis_url = redis_url
+        self.worker_id = str(uuid.uuid4())
+        self._wildcard: Set[Subscriber] = set()
+        self._by_category: Dict[str, Set[Subscriber]] = {}
+        self._by_state: Dict[str, Set[Subscriber]] = {}
+        self._by_user: Dict[str, Set[Subscriber]] = {}
+        self._redis = None
+        self._listener_task: Optional[asyncio.Task] = None
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._wildcard) + sum(len(s) for s in self._by_category.values()) + sum(
+            len(s) for s in self._by_state.values()
+        )
+
+    def subscribe(self, **kwargs) -> Subscriber:
+        """Register a new subscriber; keyword arguments go to ``Subscriber``."""
+        subscriber = Subscriber(**kwargs)
+        self._job_index_for(subscriber).add(subscriber)
+        if subscriber.user_id:
+            self._by_user.setdefault(subscriber.user_id, set()).add(subscriber)
+        return subscriber
+
+    def unsubscribe(self, subscriber: Subscriber):
+        subscriber.close()
+        self._job_index_for(subscriber).discard(subscriber)
+        self._prune(self._by_category, subscriber.category)
+        self._prune(self._by_state, subscriber.state)
+        if subscriber.user_id:
+            self._by_user.get(subscriber.user_id, set()).discard(subscriber)
+            self._prune(self._by_user, subscriber.user_id)
+
+    async def publish_job(self, job: Dict[str, Any]):
+        """Push a newly created job to every matching subscriber."""
+        category = getattr(job.get("category"), "value", job.get("category"))
+        state = (job.get("state") or "").lower()
+        await self._publish({"kind": "job", "category": category, "state": state}, job)
+
+    async def publish_notification(self, notification: Dict[str, Any], user_ids: List[str]):
+        """Push a notification to the given users, or to everyone if ``user_ids`` is empty."""
+        await self._publish({"kind": "notification", "user_ids": user_ids}, notification)
+
+    async def start(self):
+        """Connect to Redis (if configured) and start relaying remote events."""
+        if not self.redis_url or self._listener_task:
+            return
+        try:
+            import redis.asyncio as aioredis
+        except ImportError:
+            logger.warning("redis package not installed. Real-time events stay local to this worker.")
+            return
+        self._redis = aioredis.from_url(self.redis_url)
+        pubsub = self._redis.pubsub()
+        await pubsub.subscribe(REDIS_CHANNEL)
+        self._listener_task = asyncio.create_task(self._listen(pubsub))
+
+    async def stop(self):
+        if self._listener_task:
+            self._listener_task.cancel()
+            self._listener_task = None
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
+        for subscriber in list(self._iter_all()):
+            subscriber.close()
+
+    async def _publish(self, route: Dict[str, Any], payload: Dict[str, Any]):
+        data = json.dumps(payload, default=str)
+        self._deliver(route, data)
+        if self._redis is not None:
+            try:
+                envelope = {"origin": self.worker_id, "route": route, "data": data}
+                await self._redis.publish(REDIS_CHANNEL, json.dumps(envelope))
+            except Exception as e:
+                logger.error(f"Failed to relay event through Redis: {str(e)}")
+
+    async def _listen(self, pubsub):
+        try:
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                try:
+                    envelope = json.loads(message["data"])
+                    if envelope["origin"] != self.worker_id:
+                        self._deliver(envelope["route"], envelope["data"])
+                except Exception as e:
+                    logger.error(f"Failed to handle relayed event: {str(e)}")
+        except asyncio.CancelledError:
+            await pubsub.unsubscribe(REDIS_CHANNEL)
+            raise
+
+    def _deliver(self, route: Dict[str, Any], data: str):
+        # Encoded once and shared by every recipient
+        message = f"event: {route['kind']}\ndata: {data}\n\n"
+        if route["kind"] == "job":
+            category, state = route["category"], route["state"]
+            candidates = self._wildcard | self._by_category.get(category, set()) | self._by_state.get(state, set())
+            for subscriber in list(candidates):
+                if subscriber.matches_job(category, state):
+                    subscriber.offer(message)
+        elif route["user_ids"]:
+            for user_id in route["user_ids"]:
+                for subscriber in list(self._by_user.get(user_id, ())):
+                    subscriber.offer(message)
+        else:
+            for subscriber in list(self._iter_all()):
+                subscriber.offer(message)
+
+    def _job_index_for(self, subscriber: Subscriber) -> Set[Subscriber]:
+        # Index on the most selective filter; remaining filters are checked on delivery
+        if subscriber.category:
+            return self._by_category.setdefault(subscriber.category, set())
+        if subscriber.state:
+            return self._by_state.setdefault(subscriber.state, set())
+        return self._wildcard
+
+    def _iter_all(self):
+        yield from self._wildcard
+        for subscribers in self._by_category.values():
+            yield from subscribers
+        for subscribers in self._by_state.values():
+            yield from subscribers
+
+    @staticmethod
+    def _prune(index: Dict[str, Set[Subscriber]], key: Optional[str]):
+        if key and key in index and not index[key]:
+            del index[key]
+
+
+# Global event broker instance
+event_broker = EventBroker(redis_url=os.getenv("REDIS_URL"))
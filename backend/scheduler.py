@@ -0,0 +1,185 @@
+import asyncio
+import inspect
+import os
+from datetime import datetime, timedelta
+from typing import Any, Callable, List, Optional
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ASCENDING, DESCENDING
+from models import JobStatus, NotificationCreate, NotificationType
+from notification_store import notification_store
+import logging
+
+logger = logging.getLogger(__name__)
+
+ClosedJobsHook = Callable[[List[str]], Any]
+
+
+class JobLifecycleSweeper:
+    """Periodically closes expired jobs and, if enabled, sends "closing soon" reminders.
+
+    Expired jobs are closed with one ``update_many`` per batch, driven by the
+    ``(status, application_end_date)`` index. Callables registered with
+    ``on_closed`` receive the closed job ids so in-memory caches and indexes
+    can drop them. Reminders (off unless ``closing_reminders``) are targeted
+    notifications to users following the job's category who haven't applied
+    yet. Every worker may run a sweeper: closing is idempotent and reminders
+    are claimed with a conditional update so each is sent once.
+    """
+
+    def __init__(
+        self,
+        interval_seconds: float = 300,
+        closing_soon_window: timedelta = timedelta(days=2),
+        batch_size: int = 1000,
+        closing_reminders: bool = False,
+    ):
+        self.interval_seconds = interval_seconds
+        self.closing_soon_window = closing_soon_window
+        self.batch_size = batch_size
+        self.closing_reminders = closing_reminders
+        self._closed_hooks: List[ClosedJobsHook] = []
+        self._task: Optional[asyncio.Task] = None
+
+    def on_closed(self, hook: ClosedJobsHook):
+        """Register a sync or async callable to receive the ids of closed jobs."""
+        self._closed_hooks.append(hook)
+
+    async def ensure_indexes(self, db: AsyncIOMotorClient):
+        """Create the sweep index and the partial index over active jobs."""
+        await db.jobs.create_index([("status", ASCENDING), ("application_end_date", ASCENDING)])
+        # Only active jobs are indexed, so the hot listing query stays small
+        await db.jobs.create_index(
+            [("created_at", DESCENDING)],
+            name="active_jobs_by_created_at",
+            partialFilterExpression={"status": JobStatus.ACTIVE.value},
+        )
+
+    async def close_expired_jobs(self, db: AsyncIOMotorClient, now: Optional[datetime] = None) -> List[str]:
+        """Close every active job whose application window has ended."""
+        now = now or datetime.utcnow()
+        closed_ids: List[str] = []
+        while True:
+            expired = await db.jobs.find(
+                {"status": JobStatus.ACTIVE.value, "application_end_date": {"$lt": now}},
+                {"id": 1},
+            ).limit(self.batch_size).to_list(length=self.batch_size)
+            if not expired:
+                break
+
+            batch_ids = [job["id"] for job in expired]
+            result = await db.jobs.update_many(
+                {"id": {"$in": batch_ids}, "status": JobStatus.ACTIVE.value},
+                {"$set": {"status": JobStatus.CLOSED.value, "updated_at": now}},
+            )
+            closed_ids.extend(batch_ids)
+            await self._notify_closed(batch_ids)
+            # Stop if another sweeper got there first or this was the last batch
+            if not result.modified_count or len(expired) < self.batch_size:
+                break
+
+        if closed_ids:
+            logger.info(f"Closed {len(closed_ids)} expired jobs")
+        return closed_ids
+
+    async def send_closing_reminders(self, db: AsyncIOMotorClient, now: Optional[datetime] = None) -> int:
+        """Remind interested users of each active job closing within the window.
+
+        Returns the number of jobs reminded about.
+        """
+        if not self.closing_reminders:
+            return 0
+        now = now or datetime.utcnow()
+        closing = await db.jobs.find(
+            {
+                "status": JobStatus.ACTIVE.value,
+                "application_end_date": {"$gte": now, "$lt": now + self.closing_soon_window},
+                "closing_reminder_sent": {"$ne": True},
+            },
+            {"id": 1, "title": 1, "category": 1, "application_end_date": 1},
+        ).to_list(length=self.batch_size)
+
+        sent = 0
+        for job in closing:
+            # Claim the reminder so concurrent sweepers don't send it twice
+            claimed = await db.jobs.update_one(
+                {"id": job["id"], "closing_reminder_sent": {"$ne": True}},
+                {"$set": {"closing_reminder_sent": True}},
+            )
+            if not claimed.modified_count:
+                continue
+            await self._remind_interested_users(db, job)
+            sent += 1
+        return sent
+
+    async def _remind_interested_users(self, db: AsyncIOMotorClient, job: dict) -> int:
+        fields = {
+            "title": f"Closing soon: {job['title']}",
+            "message": f"Applications close on {job['application_end_date'].strftime('%B %d, %Y')}. Apply before the deadline!",
+            "type": NotificationType.JOB_ALERT,
+            "job_id": job["id"],
+        }
+        recipients = 0
+        batch: List[str] = []
+        async for user in db.users.find(
+            {"preferred_job_categories": job.get("category")}, {"id": 1}, batch_size=self.batch_size
+        ):
+            batch.append(user["id"])
+            if len(batch) == self.batch_size:
+                recipients += await self._notify_non_applicants(db, job["id"], batch, fields)
+                batch = []
+        if batch:
+            recipients += await self._notify_non_applicants(db, job["id"], batch, fields)
+        return recipients
+
+    async def _notify_non_applicants(self, db: AsyncIOMotorClient, job_id: str, user_ids: List[str], fields: dict) -> int:
+        applied = {
+            application["user_id"]
+            async for application in db.applications.find(
+                {"job_id": job_id, "user_id": {"$in": user_ids}}, {"user_id": 1}
+            )
+        }
+        user_ids = [user_id for user_id in user_ids if user_id not in applied]
+        if not user_ids:
+            return 0
+        return await notification_store.create(db, NotificationCreate(user_ids=user_ids, **fields))
+
+    async def run_once(self, db: AsyncIOMotorClient):
+        now = datetime.utcnow()
+        await self.close_expired_jobs(db, now)
+        await self.send_closing_reminders(db, now)
+
+    def start(self, db: AsyncIOMotorClient):
+        """Start the periodic sweep in the background."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop(db))
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self, db: AsyncIOMotorClient):
+        while True:
+            try:
+                await self.run_once(db)
+            except Exception as e:
+                logger.error(f"Job lifecycle sweep failed: {str(e)}")
+            await asyncio.sleep(self.interval_seconds)
+
+    async def _notify_closed(self, job_ids: List[str]):
+        for hook in self._closed_hooks:
+            try:
+                result = hook(job_ids)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.error(f"Closed-jobs hook failed: {str(e)}")
+
+
+# Global job lifecycle sweeper instance
+job_sweeper = JobLifecycleSweeper(
+    interval_seconds=float(os.getenv("JOB_SWEEP_INTERVAL_SECONDS", "300")),
+    closing_soon_window=timedelta(hours=float(os.getenv("JOB_CLOSING_SOON_HOURS", "48"))),
+    closing_reminders=os.getenv("JOB_CLOSING_REMINDERS", "0") == "1",
+)
@@ -0,0 +1,123 @@
+"""Production launcher for the API.
+
+    python serve.py --workers 4            # multi-process serving on :8001
+    python serve.py --benchmark-startup    # import-time breakdown + time to first request
+
+Each worker is a separate process with its own event loop, caches and
+Mongo pool. ``WEB_CONCURRENCY`` is exported to the workers so
+``server.mongo_pool_size()`` can split ``MONGO_POOL_BUDGET`` connections
+between them. Put a load balancer's readiness check on ``/api/health/ready``:
+a worker answers 503 there until its caches and indexes are warm.
+"""
+import argparse
+import os
+import re
+import socket
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).parent
+_IMPORT_TIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def serve(host: str, port: int, workers: int, log_level: str):
+    import uvicorn
+
+    os.environ["WEB_CONCURRENCY"] = str(workers)
+    uvicorn.run(
+        "server:app",
+        host=host,
+        port=port,
+        workers=workers,
+        log_level=log_level,
+        app_dir=str(BACKEND_DIR),
+        proxy_headers=True,
+        timeout_graceful_shutdown=30,
+    )
+
+
+def import_breakdown(top: int = 15):
+    """Print the slowest top-level imports of ``server`` (cumulative, from ``-X importtime``)."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import server"],
+        cwd=BACKEND_DIR, capture_output=True, text=True,
+    )
+    if result.returncode != 0:
+        print(result.stderr.strip().splitlines()[-1])
+        return
+
+    total = 0
+    totals = children = defaultdict(int)
+    for line in result.stderr.splitlines():
+        match = _IMPORT_TIME.match(line)
+        if not match:
+            continue
+        # The indentation is the nesting depth; children are listed before their parent
+        depth = len(match.group(3)) // 2
+        if depth == 1:
+            children[match.group(4).split(".")[0]] += int(match.group(2))
+        elif depth == 0:
+            if match.group(4) == "server":
+                total, totals = int(match.group(2)), children
+            children = defaultdict(int)
+
+    print(f"Import of server: {total / 1000:.0f} ms")
+    for module, micros in sorted(totals.items(), key=lambda item: item[1], reverse=True)[:top]:
+        print(f"  {module:<28} {micros / 1000:8.1f} ms")
+
+
+def time_to_first_request(timeout: float = 60.0):
+    """Start one worker and time how long it takes to answer the liveness and readiness probes."""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, str(BACKEND_DIR / "serve.py"), "--port", str(port), "--host", "127.0.0.1",
+         "--workers", "1", "--log-level", "warning"],
+    )
+    try:
+        for probe in ("live", "ready"):
+            while True:
+                if process.poll() is not None:
+                    print("Server exited before becoming ready")
+                    return
+                if time.perf_counter() - started > timeout:
+                    print(f"Timed out waiting for /api/health/{probe}")
+                    return
+                try:
+                    with urllib.request.urlopen(f"http://127.0.0.1:{port}/api/health/{probe}", timeout=1):
+                        break
+                except (urllib.error.URLError, ConnectionError, OSError):
+                    time.sleep(0.02)
+            print(f"First {probe} response after {(time.perf_counter() - started) * 1000:.0f} ms")
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the Government Job Portal API")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8001")))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)))
+    parser.add_argument("--log-level", default=os.getenv("LOG_LEVEL", "info"))
+    parser.add_argument("--benchmark-startup", action="store_true",
+                        help="report import times and time to first request instead of serving")
+    args = parser.parse_args()
+
+    if args.benchmark_startup:
+        import_breakdown()
+        time_to_first_request()
+    else:
+        serve(args.host, args.port, args.workers, args.log_level)
+
+
+if __name__ == "__main__":
+    main()
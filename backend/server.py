@@ -1,30 +1,83 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, Query
-from fastapi.security import HTTPBearer
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, status, Query, Request, BackgroundTasks
+from fastapi.responses import JSONResponse, StreamingResponse
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.errors import DuplicateKeyError
+from contextlib import asynccontextmanager
+import asyncio
 import os
 import logging
+import time
 from pathlib import Path
-from typing import List, Optional
+from typing import Awaitable, Callable, Dict, List, Optional
 from datetime import datetime, timedelta
 import re
 
 # Import custom modules
-from models import *
-from auth import *
+from models import (
+    AdminDashboard, EducationLevel, Job, JobApplication, JobCategory, JobCreate, JobResponse,
+    JobStatus, JobUpdate, NotificationCreate, NotificationMarkRead, NotificationPage, Token,
+    User, UserCreate, UserLogin, UserResponse,
+)
+from auth import (
+    ACCESS_TOKEN_EXPIRE_MINUTES, authenticate_user, create_access_token, get_admin_user,
+    get_current_active_user, get_current_user, get_password_hash,
+)
 from email_service import email_service
+from email_ledger import email_ledger, WELCOME, JOB_ALERT, APPLICATION_CONFIRMATION
+from cache import job_cache
+from admission import apply_admission, AdmissionRejected
+from notification_store import notification_store
+from realtime import event_broker
+from change_feed import change_feed, ChangeEvent
+from scheduler import job_sweeper
+from facets import job_facets
+from suggest import job_suggestions
+from archive import job_archiver
+from export import EXPORT_FORMATS, MEDIA_TYPES, stream_job_applications, stream_users
+from dedup import job_duplicates
+from feed import feed_builder
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
+# MongoDB connection, opened by the lifespan handler rather than at import time
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+client: Optional[AsyncIOMotorClient] = None
+db = None
+
+def mongo_pool_size() -> int:
+    """Connections per worker: MONGO_MAX_POOL_SIZE, or the MONGO_POOL_BUDGET split across WEB_CONCURRENCY workers."""
+    if os.getenv("MONGO_MAX_POOL_SIZE"):
+        return int(os.environ["MONGO_MAX_POOL_SIZE"])
+    workers = max(1, int(os.getenv("WEB_CONCURRENCY", "1")))
+    return max(5, int(os.getenv("MONGO_POOL_BUDGET", "100")) // workers)
+
+def connect_database():
+    """Create the Motor client for this worker on first use."""
+    global client, db
+    if client is None:
+        client = AsyncIOMotorClient(mongo_url, maxPoolSize=mongo_pool_size())
+        db = client[os.environ['DB_NAME']]
+    return db
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    connect_database()
+    app.state.ready = False
+    # Serve liveness checks straight away; readiness waits for the warm-up
+    warm_up_task = asyncio.create_task(warm_up(app))
+    try:
+        yield
+    finally:
+        warm_up_task.cancel()
+        await asyncio.gather(warm_up_task, return_exceptions=True)
+        await shutdown_services()
 
 # Create the main app
-app = FastAPI(title="Government Job Portal API", version="1.0.0")
+app = FastAPI(title="Government Job Portal API", version="1.0.0", lifespan=lifespan)
 api_router = APIRouter(prefix="/api")
 
 # Add CORS middleware
@@ -38,7 +91,15 @@ app.add_middleware(
 
 # Dependency to get database
 async def get_database():
-    return db
+    return connect_database()
+
+# Dependency for admin-only endpoints: resolves the bearer token against this app's database
+async def require_admin(
+    credentials: HTTPAuthorizationCredentials = Depends(HTTPBearer()),
+    db: AsyncIOMotorClient = Depends(get_database),
+) -> User:
+    user = await get_current_active_user(await get_current_user(credentials, db))
+    return await get_admin_user(user)
 
 # Configure logging
 logging.basicConfig(
@@ -72,10 +133,11 @@ async def register_user(user_data: UserCreate, db: AsyncIOMotorClient = Depends(
     
     # Save to database
     await db.users.insert_one(user.dict())
+    await notification_store.init_user(db, user.id)
     
     # Send welcome email
     try:
-        await email_service.send_welcome_email(user)
+        await send_email_once(db, email_ledger.key(user.id, WELCOME), lambda: email_service.send_welcome_email(user))
     except Exception as e:
         logger.error(f"Failed to send welcome email: {str(e)}")
     
@@ -155,12 +217,31 @@ async def get_jobs(
     
     return [JobResponse(**job) for job in jobs]
 
+@api_router.get("/jobs/facets")
+async def get_job_facets(
+    category: Optional[JobCategory] = None,
+    state: Optional[str] = None,
+    education_level: Optional[EducationLevel] = None,
+    salary: Optional[str] = Query(None, description="Salary bucket, e.g. 20k_40k"),
+):
+    """Get active job counts per category, state, education level and salary bucket."""
+    return job_facets.counts({
+        "category": category.value if category else None,
+        "state": state,
+        "min_education": education_level.value if education_level else None,
+        "salary": salary,
+    })
+
 @api_router.get("/jobs/{job_id}", response_model=JobResponse)
 async def get_job_by_id(job_id: str, db: AsyncIOMotorClient = Depends(get_database)):
     """Get job by ID."""
     job = await db.jobs.find_one({"id": job_id})
     if not job:
-        raise HTTPException(status_code=404, detail="Job not found")
+        # Old closed jobs live in the archive; they are served read-only
+        archived_job = await job_archiver.find_archived_job(db, job_id)
+        if not archived_job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        return JobResponse(**archived_job)
     
     # Increment view count
     await db.jobs.update_one({"id": job_id}, {"$inc": {"views": 1}})
@@ -170,6 +251,7 @@ async def get_job_by_id(job_id: str, db: AsyncIOMotorClient = Depends(get_databa
 @api_router.post("/jobs", response_model=JobResponse)
 async def create_job(
     job_data: JobCreate, 
+    background_tasks: BackgroundTasks,
     db: AsyncIOMotorClient = Depends(get_database),
     # current_user: User = Depends(get_admin_user)  # Requires admin access
 ):
@@ -179,14 +261,31 @@ async def create_job(
     
     job = Job(**job_dict)
     
+    # Flag re-posts of a notice that is already active
+    duplicate = job_duplicates.find_duplicate(job.dict())
+    if duplicate:
+        job.duplicate_of = duplicate[0]
+        logger.info(f"Job {job.id} looks like a duplicate of {duplicate[0]} (similarity {duplicate[1]:.2f})")
+    
     # Save to database
     await db.jobs.insert_one(job.dict())
+    index_job(job.dict())
+    
+    # Duplicates are listed but don't notify users a second time
+    if job.duplicate_of:
+        return JobResponse(**job.dict())
     
-    # Send job alerts to subscribed users
+    # Push the new job to connected clients
     try:
-        await send_job_alerts_to_users(db, job)
+        await event_broker.publish_job(JobResponse(**job.dict()).dict())
     except Exception as e:
-        logger.error(f"Failed to send job alerts: {str(e)}")
+        logger.error(f"Failed to publish job event: {str(e)}")
+    
+    # Fan the job out to the precomputed feeds after the response is sent
+    background_tasks.add_task(add_job_to_feeds, db, job.dict())
+    
+    # Send job alerts to subscribed users after the response is sent
+    background_tasks.add_task(send_job_alerts, db, job)
     
     return JobResponse(**job.dict())
 
@@ -206,8 +305,12 @@ async def update_job(
     update_data["updated_at"] = datetime.utcnow()
     
     await db.jobs.update_one({"id": job_id}, {"$set": update_data})
+    job_cache.invalidate(job_id)
     
     updated_job = await db.jobs.find_one({"id": job_id})
+    index_job(updated_job)
+    if updated_job["status"] != JobStatus.ACTIVE.value:
+        await feed_builder.remove_jobs(db, [job_id])
     return JobResponse(**updated_job)
 
 @api_router.delete("/jobs/{job_id}")
@@ -218,11 +321,31 @@ async def delete_job(
 ):
     """Delete job posting (Admin only)."""
     result = await db.jobs.delete_one({"id": job_id})
+    job_cache.invalidate(job_id)
+    unindex_jobs([job_id])
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Job not found")
+    await feed_builder.remove_jobs(db, [job_id])
     
     return {"message": "Job deleted successfully"}
 
+@api_router.get("/feed", response_model=List[JobResponse])
+async def get_job_feed(
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncIOMotorClient = Depends(get_database),
+    # current_user: User = Depends(get_current_active_user)
+):
+    """Get the user's personalized job feed, best matches first."""
+    user_id = "mock_user_id"  # current_user.id
+    
+    job_ids = (await feed_builder.get_job_ids(db, user_id))[:limit]
+    jobs = {
+        job["id"]: job
+        async for job in db.jobs.find({"id": {"$in": job_ids}, "status": JobStatus.ACTIVE.value})
+    }
+    
+    return [JobResponse(**jobs[job_id]) for job_id in job_ids if job_id in jobs]
+
 # =======================
 # APPLICATION ROUTES
 # =======================
@@ -234,35 +357,54 @@ async def apply_for_job(
     # current_user: User = Depends(get_current_active_user)
 ):
     """Apply for a job."""
-    # Check if job exists
-    job = await db.jobs.find_one({"id": job_id})
+    # Check if job exists (served from cache so deadline bursts don't hit the DB)
+    job = await job_cache.get(db, job_id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     
+    # Reject closed or expired jobs before doing any database work
+    if job.get("status") != JobStatus.ACTIVE or job["application_end_date"] < datetime.utcnow():
+        raise HTTPException(status_code=400, detail="Applications for this job are closed")
+    
     # Mock user for now
     user_id = "mock_user_id"
     
-    # Check if already applied
-    existing_application = await db.applications.find_one({
-        "job_id": job_id,
-        "user_id": user_id
-    })
-    if existing_application:
-        raise HTTPException(status_code=400, detail="Already applied for this job")
-    
-    # Create application
-    application = JobApplication(job_id=job_id, user_id=user_id)
-    await db.applications.insert_one(application.dict())
-    
-    # Update job applications count
-    await db.jobs.update_one({"id": job_id}, {"$inc": {"applications_count": 1}})
+    try:
+        async with apply_admission.slot(job_id):
+            # Check if already applied
+            existing_application = await db.applications.find_one({
+                "job_id": job_id,
+                "user_id": user_id
+            })
+            if existing_application:
+                raise HTTPException(status_code=400, detail="Already applied for this job")
+            
+            # Create application
+            application = JobApplication(job_id=job_id, user_id=user_id)
+            try:
+                await db.applications.insert_one(application.dict())
+            except DuplicateKeyError:
+                raise HTTPException(status_code=400, detail="Already applied for this job")
+            
+            # Update job applications count
+            await db.jobs.update_one({"id": job_id}, {"$inc": {"applications_count": 1}})
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many applications are being processed, please retry shortly",
+            headers={"Retry-After": str(e.retry_after)},
+        )
     
     # Send confirmation email
     try:
         # Mock user for email
         mock_user = User(email="user@example.com", full_name="User", id=user_id)
         job_obj = Job(**job)
-        await email_service.send_application_confirmation(mock_user, job_obj)
+        await send_email_once(
+            db,
+            email_ledger.key(user_id, APPLICATION_CONFIRMATION, job_id),
+            lambda: email_service.send_application_confirmation(mock_user, job_obj),
+        )
     except Exception as e:
         logger.error(f"Failed to send confirmation email: {str(e)}")
     
@@ -303,22 +445,183 @@ async def get_admin_dashboard(
         recent_users=recent_users
     )
 
+@api_router.post("/admin/archive", status_code=status.HTTP_202_ACCEPTED)
+async def archive_closed_jobs(
+    background_tasks: BackgroundTasks,
+    db: AsyncIOMotorClient = Depends(get_database),
+    # current_user: User = Depends(get_admin_user)
+):
+    """Start moving closed jobs past the retention window, with their applications, to the archive."""
+    summary = await job_archiver.create_run(db)
+    background_tasks.add_task(run_job_archive, db, summary)
+    return {"message": "Archive run started", "run_id": summary["run_id"], "cutoff": summary["cutoff"]}
+
+@api_router.get("/admin/archive/{run_id}")
+async def get_archive_run(
+    run_id: str,
+    db: AsyncIOMotorClient = Depends(get_database),
+    # current_user: User = Depends(get_admin_user)
+):
+    """Get the progress of an archive run."""
+    run = await job_archiver.get_run(db, run_id)
+    if not run:
+        raise HTTPException(status_code=404, detail="Archive run not found")
+    return run
+
+@api_router.get("/admin/jobs/{job_id}/applications/export")
+async def export_job_applications(
+    job_id: str,
+    export_format: str = Query("csv", alias="format", pattern=f"^({'|'.join(EXPORT_FORMATS)})$"),
+    db: AsyncIOMotorClient = Depends(get_database),
+    current_user: User = Depends(require_admin),  # Bulk personal data: admins only
+):
+    """Stream all applicants for a job as CSV or JSON Lines (Admin only)."""
+    collection = "applications"
+    if not await db.jobs.find_one({"id": job_id}, {"_id": 1}):
+        if not await job_archiver.find_archived_job(db, job_id):
+            raise HTTPException(status_code=404, detail="Job not found")
+        collection = "applications_archive"
+    
+    return StreamingResponse(
+        stream_job_applications(db, job_id, export_format, collection=collection),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="applications-{job_id}.{export_format}"'},
+    )
+
+@api_router.get("/admin/users/export")
+async def export_users(
+    export_format: str = Query("csv", alias="format", pattern=f"^({'|'.join(EXPORT_FORMATS)})$"),
+    db: AsyncIOMotorClient = Depends(get_database),
+    current_user: User = Depends(require_admin),  # Bulk personal data: admins only
+):
+    """Stream all users as CSV or JSON Lines (Admin only)."""
+    return StreamingResponse(
+        stream_users(db, export_format),
+        media_type=MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="users.{export_format}"'},
+    )
+
+@api_router.post("/admin/duplicates/scan")
+async def scan_duplicate_jobs(
+    mark: bool = False,
+    db: AsyncIOMotorClient = Depends(get_database),
+    # current_user: User = Depends(get_admin_user)
+):
+    """Find active jobs that duplicate an earlier posting, optionally flagging them (Admin only)."""
+    duplicates = await job_duplicates.backfill(db, mark=mark)
+    return {"duplicates": duplicates, "count": len(duplicates)}
+
 # =======================
 # NOTIFICATION ROUTES
 # =======================
 
-@api_router.get("/notifications")
+@api_router.get("/notifications", response_model=NotificationPage)
 async def get_user_notifications(
+    cursor: Optional[str] = None,
+    limit: int = Query(20, ge=1, le=100),
     db: AsyncIOMotorClient = Depends(get_database),
     # current_user: User = Depends(get_current_active_user)
 ):
-    """Get user notifications."""
+    """Get user notifications, newest first, with cursor pagination."""
     user_id = "mock_user_id"  # current_user.id
     
-    notifications_cursor = db.notifications.find({"user_id": user_id}).sort("created_at", -1).limit(20)
-    notifications = await notifications_cursor.to_list(length=20)
+    try:
+        items, next_cursor = await notification_store.list_inbox(db, user_id, limit=limit, cursor=cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    unread_count = await notification_store.unread_count(db, user_id)
+    
+    return NotificationPage(items=items, next_cursor=next_cursor, unread_count=unread_count)
+
+@api_router.get("/notifications/unread-count")
+async def get_unread_notification_count(
+    db: AsyncIOMotorClient = Depends(get_database),
+    # current_user: User = Depends(get_current_active_user)
+):
+    """Get the number of unread notifications."""
+    user_id = "mock_user_id"  # current_user.id
     
-    return [Notification(**notif) for notif in notifications]
+    return {"unread_count": await notification_store.unread_count(db, user_id)}
+
+@api_router.post("/notifications/read")
+async def mark_notifications_read(
+    mark_data: NotificationMarkRead,
+    db: AsyncIOMotorClient = Depends(get_database),
+    # current_user: User = Depends(get_current_active_user)
+):
+    """Mark notifications as read (all of them if no IDs are given)."""
+    user_id = "mock_user_id"  # current_user.id
+    
+    await notification_store.mark_read(db, user_id, mark_data.notification_ids)
+    
+    return {"unread_count": await notification_store.unread_count(db, user_id)}
+
+@api_router.post("/notifications")
+async def create_notification(
+    notification_data: NotificationCreate,
+    db: AsyncIOMotorClient = Depends(get_database),
+    # current_user: User = Depends(get_admin_user)
+):
+    """Send a notification to specific users, or to everyone (Admin only)."""
+    recipients = await notification_store.create(db, notification_data)
+    
+    try:
+        await event_broker.publish_notification(
+            notification_data.dict(exclude={"user_ids"}), notification_data.user_ids
+        )
+    except Exception as e:
+        logger.error(f"Failed to publish notification event: {str(e)}")
+    
+    if recipients == 0:
+        return {"message": "Notification broadcast to all users"}
+    return {"message": f"Notification sent to {recipients} users"}
+
+# =======================
+# SUGGESTION ROUTES
+# =======================
+
+@api_router.get("/suggest")
+async def suggest(
+    q: str = Query(..., min_length=1, description="Typed prefix"),
+    limit: int = Query(10, ge=1, le=20),
+):
+    """Autocomplete job titles, organizations, locations and states."""
+    return job_suggestions.suggest(q, limit)
+
+# =======================
+# REAL-TIME ROUTES
+# =======================
+
+STREAM_HEARTBEAT_SECONDS = 15
+
+@api_router.get("/stream")
+async def stream_events(
+    request: Request,
+    category: Optional[JobCategory] = None,
+    state: Optional[str] = None,
+    # current_user: User = Depends(get_current_active_user)
+):
+    """Server-sent events stream of new jobs and notifications."""
+    user_id = "mock_user_id"  # current_user.id
+    subscriber = event_broker.subscribe(category=category, state=state, user_id=user_id)
+    
+    async def event_stream():
+        try:
+            while not await request.is_disconnected():
+                try:
+                    message = await subscriber.next_message(timeout=STREAM_HEARTBEAT_SECONDS)
+                except ConnectionAbortedError:
+                    break
+                # Comment lines keep proxies from closing idle connections
+                yield message if message is not None else ": keep-alive\n\n"
+        finally:
+            event_broker.unsubscribe(subscriber)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
 # =======================
 # SEARCH ROUTES
@@ -361,6 +664,17 @@ async def search_jobs(
 # UTILITY FUNCTIONS
 # =======================
 
+ALERT_BATCH_SIZE = 500
+# Recipients per job alert (0 = no cap); matching users beyond it are not emailed
+ALERT_MAX_RECIPIENTS = int(os.getenv("JOB_ALERT_MAX_RECIPIENTS", "1000"))
+
+async def send_job_alerts(db: AsyncIOMotorClient, job: Job):
+    """Send the alerts for a new job, off the request path."""
+    try:
+        await send_job_alerts_to_users(db, job)
+    except Exception as e:
+        logger.error(f"Failed to send job alerts: {str(e)}")
+
 async def send_job_alerts_to_users(db: AsyncIOMotorClient, job: Job):
     """Send job alerts to users based on their preferences."""
     # Find users who might be interested in this job
@@ -375,16 +689,112 @@ async def send_job_alerts_to_users(db: AsyncIOMotorClient, job: Job):
     if job.min_education:
         filter_query["education_level"] = job.min_education
     
-    users_cursor = db.users.find(filter_query)
-    users = await users_cursor.to_list(length=1000)  # Limit to prevent overload
-    
-    # Send emails
+    # Stream recipients in batches instead of loading them all
+    users_cursor = db.users.find(filter_query, batch_size=ALERT_BATCH_SIZE).limit(ALERT_MAX_RECIPIENTS)
+    batch = []
+    async for user_data in users_cursor:
+        batch.append(user_data)
+        if len(batch) == ALERT_BATCH_SIZE:
+            await send_job_alert_batch(db, job, batch)
+            batch = []
+    if batch:
+        await send_job_alert_batch(db, job, batch)
+
+async def send_job_alert_batch(db: AsyncIOMotorClient, job: Job, users: List[Dict]):
+    """Send a job alert to one batch of users, skipping those who already received it."""
+    # Nothing can be sent, so don't claim (and then release) every recipient
+    if not email_service.enabled:
+        return
+    keys = {user_data["id"]: email_ledger.key(user_data["id"], JOB_ALERT, job.id) for user_data in users}
+    claimed = await email_ledger.claim(db, keys.values())
+    
+    sent, failed = [], []
     for user_data in users:
+        key = keys[user_data["id"]]
+        if key not in claimed:
+            continue
         try:
             user = User(**user_data)
-            await email_service.send_job_alert(user, [job])
+            if await email_service.send_job_alert(user, [job]):
+                sent.append(key)
+            else:
+                failed.append(key)
         except Exception as e:
+            failed.append(key)
             logger.error(f"Failed to send job alert to {user_data.get('email')}: {str(e)}")
+    await email_ledger.mark_sent(db, sent)
+    await email_ledger.release(db, failed)
+
+async def send_email_once(db: AsyncIOMotorClient, key: str, send: Callable[[], Awaitable[bool]]) -> bool:
+    """Send an email unless the delivery ledger already has it."""
+    if not email_service.enabled:
+        return False
+    if key not in await email_ledger.claim(db, [key]):
+        return False
+    try:
+        sent = await send()
+    except Exception:
+        await email_ledger.release(db, [key])
+        raise
+    if sent:
+        await email_ledger.mark_sent(db, [key])
+    else:
+        await email_ledger.release(db, [key])
+    return sent
+
+def refresh_cached_job(event: ChangeEvent):
+    """Keep the job cache in step with changes made by other workers or scripts."""
+    if event.document_id is None:
+        job_cache.clear()
+    elif event.operation == "delete" or event.document is None:
+        job_cache.invalidate(event.document_id)
+    else:
+        job_cache.set(event.document_id, event.document)
+
+# In-memory indexes derived from active jobs
+job_indexes = [job_facets, job_suggestions, job_duplicates]
+
+def index_job(job: dict):
+    """Apply a created or updated job to every in-memory job index."""
+    for index in job_indexes:
+        index.upsert(job)
+
+def unindex_jobs(job_ids: List[str]):
+    """Drop deleted or closed jobs from every in-memory job index."""
+    for index in job_indexes:
+        index.remove_many(job_ids)
+
+change_feed.register("jobs", refresh_cached_job)
+job_sweeper.on_closed(job_cache.invalidate_many)
+for index in job_indexes:
+    change_feed.register("jobs", index.apply_change)
+job_sweeper.on_closed(unindex_jobs)
+
+async def run_job_archive(db: AsyncIOMotorClient, summary: dict):
+    """Carry out an archive run started through the admin API."""
+    try:
+        await job_archiver.run(db, summary=summary)
+    except Exception as e:
+        logger.error(f"Archive run {summary['run_id']} failed: {str(e)}")
+        await db.archive_runs.update_one({"_id": summary["run_id"]}, {"$set": {"error": str(e)}})
+
+async def add_job_to_feeds(db: AsyncIOMotorClient, job: dict):
+    """Push a new job into the precomputed user feeds it ranks in."""
+    try:
+        await feed_builder.add_job(db, job)
+    except Exception as e:
+        logger.error(f"Failed to update job feeds: {str(e)}")
+
+async def remove_jobs_from_feeds(job_ids: List[str]):
+    """Drop closed jobs from the precomputed user feeds."""
+    await feed_builder.remove_jobs(db, job_ids)
+
+async def refresh_user_feed(event: ChangeEvent):
+    """Drop a user's feed when their profile preferences change."""
+    await feed_builder.apply_user_change(db, event)
+
+change_feed.register("users", refresh_user_feed)
+job_sweeper.on_closed(remove_jobs_from_feeds)
 
 # =======================
 # MOCK DATA ROUTES
@@ -446,9 +856,26 @@ async def seed_mock_data(db: AsyncIOMotorClient = Depends(get_database)):
     for job_data in mock_jobs:
         job = Job(**job_data)
         await db.jobs.insert_one(job.dict())
+        index_job(job.dict())
     
     return {"message": f"Seeded {len(mock_jobs)} mock jobs successfully"}
 
+# =======================
+# HEALTH ROUTES
+# =======================
+
+@api_router.get("/health/live")
+async def liveness():
+    """Liveness probe: the worker is up and serving requests."""
+    return {"status": "ok"}
+
+@api_router.get("/health/ready")
+async def readiness(request: Request):
+    """Readiness probe: 503 until this worker's caches and indexes are warm."""
+    if not getattr(request.app.state, "ready", False):
+        return JSONResponse(status_code=503, content={"status": "warming"})
+    return {"status": "ready"}
+
 # Include router in app
 app.include_router(api_router)
 
@@ -457,6 +884,84 @@ app.include_router(api_router)
 async def root():
     return {"message": "Government Job Portal API is running!"}
 
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
+async def create_indexes():
+    try:
+        # Makes the duplicate-application check an index lookup under load
+        await db.applications.create_index([("job_id", 1), ("user_id", 1)], unique=True)
+    except Exception as e:
+        logger.error(f"Failed to create application indexes: {str(e)}")
+    try:
+        await notification_store.ensure_indexes(db)
+    except Exception as e:
+        logger.error(f"Failed to create notification indexes: {str(e)}")
+    try:
+        await job_archiver.ensure_indexes(db)
+    except Exception as e:
+        logger.error(f"Failed to create archive indexes: {str(e)}")
+    try:
+        await feed_builder.ensure_indexes(db)
+    except Exception as e:
+        logger.error(f"Failed to create feed indexes: {str(e)}")
+    try:
+        await job_sweeper.ensure_indexes(db)
+    except Exception as e:
+        logger.error(f"Failed to create job lifecycle indexes: {str(e)}")
+    try:
+        await email_ledger.ensure_indexes(db)
+    except Exception as e:
+        logger.error(f"Failed to create email ledger indexes: {str(e)}")
+
+async def start_event_broker():
+    try:
+        await event_broker.start()
+    except Exception as e:
+        logger.error(f"Failed to start event relay: {str(e)}")
+
+async def load_job_index(index):
+    try:
+        await index.load(db)
+    except Exception as e:
+        logger.error(f"Failed to load {type(index).__name__}: {str(e)}")
+
+async def warm_job_cache():
+    try:
+        await job_cache.warm(db, limit=int(os.getenv("JOB_CACHE_WARM_SIZE", "200")))
+    except Exception as e:
+        logger.error(f"Failed to warm job cache: {str(e)}")
+
+async def load_email_ledger():
+    try:
+        await email_ledger.load(db)
+    except Exception as e:
+        logger.error(f"Failed to load email ledger: {str(e)}")
+
+async def warm_up(app: FastAPI):
+    """Build indexes and in-memory state concurrently, then mark the worker ready."""
+    started = time.perf_counter()
+    # Pin the change feed position first, so writes made while loading are replayed
+    try:
+        await change_feed.mark_positions(db)
+    except Exception as e:
+        logger.error(f"Failed to mark change feed positions: {str(e)}")
+    await asyncio.gather(
+        create_indexes(),
+        start_event_broker(),
+        warm_job_cache(),
+        load_email_ledger(),
+        *(load_job_index(index) for index in job_indexes),
+    )
+    # Tail from the marked positions once the in-memory indexes hold a snapshot
+    try:
+        await change_feed.start(db)
+    except Exception as e:
+        logger.error(f"Failed to start change feed: {str(e)}")
+    job_sweeper.start(db)
+    app.state.ready = True
+    logger.info(f"Worker {os.getpid()} ready after {time.perf_counter() - started:.2f}s warm-up")
+
+async def shutdown_services():
+    await job_sweeper.stop()
+    await change_feed.stop()
+    await event_broker.stop()
+    if client is not None:
+        client.close()
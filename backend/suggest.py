@@ -0,0 +1,398 @@
+import asyncio
+import bisect
+import heapq
+import math
+import re
+from array import array
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from motor.motor_asyncio import AsyncIOMotorClient
+from models import JobStatus
+from change_feed import ChangeEvent
+import logging
+
+logger = logging.getLogger(__name__)
+
+SUGGEST_FIELDS = ("title", "organization", "location", "state")
+# Fields where users often type a later word first ("baroda" for "Bank of Baroda")
+WORD_START_FIELDS = ("title", "organization")
+STOPWORDS = {"of", "the", "and", "for", "in", "online", "form", "recruitment"}
+MAX_WORD_STARTS = 6
+# Entries per sorted run when building the prefix array
+SORT_RUN_SIZE = 20000
+
+_NON_WORD = re.compile(r"[^\w]+")
+_FIELD_INDEX = {field: i for i, field in enumerate(SUGGEST_FIELDS)}
+_WORD_START_INDEXES = {_FIELD_INDEX[field] for field in WORD_START_FIELDS}
+
+# (field index, display text, normalized text) of one suggestible value
+Term = Tuple[int, str, str]
+
+
+def normalize(text: str) -> str:
+    return " ".join(_NON_WORD.sub(" ", text.lower()).split())
+
+
+def terms_of(job: Dict[str, Any]) -> Tuple[float, List[Term]]:
+    """Return a job's weight and the values it contributes (none unless active)."""
+    if str(getattr(job.get("status"), "value", job.get("status"))) != JobStatus.ACTIVE.value:
+        return 0.0, []
+    weight = 1.0 + math.log1p(job.get("views") or 0) + 2.0 * math.log1p(job.get("applications_count") or 0)
+    terms = []
+    for field in SUGGEST_FIELDS:
+        display = (job.get(field) or "").strip()
+        full_value = normalize(display)
+        if full_value:
+            terms.append((_FIELD_INDEX[field], display, full_value))
+    return weight, terms
+
+
+def _match_offsets(field_index: int, full_value: str) -> List[int]:
+    """Offsets in ``full_value`` where a typed prefix may start matching."""
+    offsets = [0]
+    if field_index in _WORD_START_INDEXES:
+        words = full_value.split(" ")
+        offset = 0
+        for i in range(min(len(words), MAX_WORD_STARTS)):
+            if i and words[i] not in STOPWORDS:
+                offsets.append(offset)
+            offset += len(words[i]) + 1
+    return offsets
+
+
+class _IndexState:
+    """The data behind one generation of a ``SuggestionIndex``.
+
+    Every distinct (field, value) is stored once and identified by a small
+    integer. Matchable texts are suffixes of those values, so the prefix
+    array holds ``(value, offset)`` pairs in two flat arrays, sorted by the
+    suffix they denote. A max segment tree over the entry weights answers
+    "heaviest entry in this range", so the top ``k`` of any prefix costs
+    ``O(k log n)`` however broad it is. Values first seen after the build
+    go to a small sorted overlay until the next rebuild.
+    """
+
+    def __init__(self):
+        self.displays: List[str] = []
+        self.norms: List[str] = []
+        self.fields = bytearray()
+        self.value_ids: List[Dict[str, int]] = [{} for _ in SUGGEST_FIELDS]
+        self.weights = array("d")
+        self.counts = array("i")
+        # job id -> (weight, value ids)
+        self.job_terms: Dict[str, Tuple[float, Tuple[int, ...]]] = {}
+        self.built = False
+        self.entry_values = array("i")
+        self.entry_offsets = array("I")
+        self.entry_weights = array("d")
+        self.tree = array("i")
+        # Entry positions of each value present at build time, grouped by value
+        self.value_start = array("i", [0])
+        self.value_positions = array("i")
+        self.overlay: List[Tuple[str, int]] = []
+        self._overlay_values = set()
+
+    @classmethod
+    def from_jobs(cls, jobs: Iterable[Dict[str, Any]]) -> "_IndexState":
+        state = cls()
+        for job in jobs:
+            state.set_job(job["id"], *terms_of(job))
+        state.build()
+        return state
+
+    @classmethod
+    def from_terms(cls, jobs: List[Tuple[str, Tuple[float, Tuple[int, ...]]]], source: "_IndexState") -> "_IndexState":
+        """Rebuild from another state's jobs, dropping values no job uses any more."""
+        state = cls()
+        for job_id, (weight, value_ids) in jobs:
+            terms = [(source.fields[v], source.displays[v], source.norms[v]) for v in value_ids]
+            state.set_job(job_id, weight, terms)
+        state.build()
+        return state
+
+    def value_id(self, field_index: int, display: str, full_value: str) -> int:
+        ids = self.value_ids[field_index]
+        value_id = ids.get(full_value)
+        if value_id is None:
+            value_id = ids[full_value] = len(self.norms)
+            self.displays.append(display)
+            self.norms.append(full_value)
+            self.fields.append(field_index)
+            self.weights.append(0.0)
+            self.counts.append(0)
+        return value_id
+
+    def set_job(self, job_id: str, weight: float, terms: List[Term]):
+        """Move a job to ``terms``, adjusting only the values whose weight changed."""
+        value_ids = tuple(self.value_id(*term) for term in terms)
+        old = self.job_terms.pop(job_id, None)
+        if value_ids:
+            self.job_terms[job_id] = (weight, value_ids)
+        if old == (weight, value_ids):
+            return
+
+        touched = set(value_ids)
+        if old is not None:
+            for value_id in old[1]:
+                self.counts[value_id] -= 1
+                self.weights[value_id] -= old[0]
+            touched.update(old[1])
+        for value_id in value_ids:
+            self.counts[value_id] += 1
+            self.weights[value_id] += weight
+        for value_id in touched:
+            if not self.counts[value_id]:
+                self.weights[value_id] = 0.0
+            if self.built:
+                self._reindex(value_id)
+
+    def build(self):
+        """Sort every matchable suffix once and build the segment tree over it."""
+        # Sorted in chunks and merged: one big list.sort() would hold the GIL,
+        # and so stall the event loop, for the whole sort
+        runs, run = [], []
+        for v in range(len(self.norms)):
+            if not self.counts[v]:
+                continue
+            full_value, field_index = self.norms[v], self.fields[v]
+            for offset in _match_offsets(field_index, full_value):
+                run.append((full_value[offset:], field_index, full_value, v, offset))
+            if len(run) >= SORT_RUN_SIZE:
+                run.sort()
+                runs.append(run)
+                run = []
+        run.sort()
+        runs.append(run)
+        self.entry_values = array("i")
+        self.entry_offsets = array("I")
+        for _, _, _, v, offset in heapq.merge(*runs):
+            self.entry_values.append(v)
+            self.entry_offsets.append(offset)
+        del runs, run
+        self.entry_weights = array("d", (self.weights[v] for v in self.entry_values))
+
+        per_value = array("i", [0]) * len(self.norms)
+        for v in self.entry_values:
+            per_value[v] += 1
+        self.value_start = array("i", [0])
+        for count in per_value:
+            self.value_start.append(self.value_start[-1] + count)
+        self.value_positions = array("i", [0]) * len(self.entry_values)
+        filled = array("i", self.value_start[:-1])
+        for position, v in enumerate(self.entry_values):
+            self.value_positions[filled[v]] = position
+            filled[v] += 1
+
+        n = len(self.entry_values)
+        self.tree = array("i", [-1]) * (2 * n)
+        self.tree[n:] = array("i", range(n))
+        for node in range(n - 1, 0, -1):
+            self.tree[node] = self._better(self.tree[2 * node], self.tree[2 * node + 1])
+        self.built = True
+
+    def top(self, prefix: str, limit: int) -> List[int]:
+        """Return up to ``limit`` distinct live value ids matching ``prefix``, heaviest first."""
+        n = len(self.entry_values)
+        suffix = self._suffix
+        lo = bisect.bisect_left(range(n), prefix, key=suffix)
+        hi = bisect.bisect_left(range(lo, n), prefix + "\uffff", key=suffix) + lo
+
+        ranked: List[int] = []
+        seen = set()
+        heap: List[Tuple[float, int, int, int]] = []
+        self._push(heap, lo, hi)
+        while heap and len(ranked) < limit:
+            _, position, start, end = heapq.heappop(heap)
+            value_id = self.entry_values[position]
+            if value_id not in seen:
+                seen.add(value_id)
+                ranked.append(value_id)
+            self._push(heap, start, position)
+            self._push(heap, position + 1, end)
+
+        start = bisect.bisect_left(self.overlay, (prefix,))
+        end = bisect.bisect_left(self.overlay, (prefix + "\uffff",))
+        late = {v for _, v in self.overlay[start:end] if self.counts[v] and v not in seen}
+        if late:
+            # Stable sort: ties keep the prefix array's order
+            ranked = sorted(ranked + sorted(late), key=lambda v: -self.weights[v])[:limit]
+        return ranked
+
+    def _suffix(self, position: int) -> str:
+        return self.norms[self.entry_values[position]][self.entry_offsets[position]:]
+
+    def _push(self, heap: list, start: int, end: int):
+        if start < end:
+            position = self._argmax(start, end)
+            weight = self.entry_weights[position]
+            if weight > 0:
+                heapq.heappush(heap, (-weight, position, start, end))
+
+    def _better(self, a: int, b: int) -> int:
+        """The heavier of two entry positions; the earlier one on ties, -1 for none."""
+        if a < 0:
+            return b
+        if b < 0:
+            return a
+        wa, wb = self.entry_weights[a], self.entry_weights[b]
+        return a if wa > wb or (wa == wb and a < b) else b
+
+    def _argmax(self, start: int, end: int) -> int:
+        tree, weights = self.tree, self.entry_weights
+        n = len(self.entry_values)
+        best, best_weight = -1, -1.0
+        start += n
+        end += n
+        while start < end:
+            if start & 1:
+                candidate = tree[start]
+                if weights[candidate] > best_weight or (weights[candidate] == best_weight and candidate < best):
+                    best, best_weight = candidate, weights[candidate]
+                start += 1
+            if end & 1:
+                end -= 1
+                candidate = tree[end]
+                if weights[candidate] > best_weight or (weights[candidate] == best_weight and candidate < best):
+                    best, best_weight = candidate, weights[candidate]
+            start >>= 1
+            end >>= 1
+        return best
+
+    def _reindex(self, value_id: int):
+        if value_id < len(self.value_start) - 1:
+            n = len(self.entry_values)
+            weight = self.weights[value_id]
+            for i in range(self.value_start[value_id], self.value_start[value_id + 1]):
+                position = self.value_positions[i]
+                self.entry_weights[position] = weight
+                node = (position + n) >> 1
+                while node:
+                    self.tree[node] = self._better(self.tree[2 * node], self.tree[2 * node + 1])
+                    node >>= 1
+        elif self.counts[value_id] and value_id not in self._overlay_values:
+            self._overlay_values.add(value_id)
+            full_value = self.norms[value_id]
+            for offset in _match_offsets(self.fields[value_id], full_value):
+                bisect.insort(self.overlay, (full_value[offset:], value_id))
+
+
+class SuggestionIndex:
+    """Prefix index for typeahead over active job titles, organizations and places.
+
+    Each value is matched from its start and, for titles and organizations,
+    from later words too. Suggestions are ranked by a weight summed over the
+    jobs containing the value (based on views and applications), and any
+    prefix, seen before or not, costs two binary searches plus ``O(k log n)``
+    segment tree steps. See ``_IndexState`` for the layout.
+
+    Sorting the index is done in a worker thread and the new generation is
+    swapped in, so ``load`` (at start-up and on ``invalidate``) doesn't stall
+    the event loop; changes arriving meanwhile are replayed onto it. Values
+    added after a build are kept in an overlay of at most ``overlay_limit``
+    entries before the index is compacted the same way.
+    """
+
+    def __init__(self, max_limit: int = 20, overlay_limit: int = 2000):
+        self.max_limit = max_limit
+        self.overlay_limit = overlay_limit
+        self._db: Optional[AsyncIOMotorClient] = None
+        # Changes made while a new generation is being built, by job id (None = removed)
+        self._pending: Optional[Dict[str, Optional[Dict[str, Any]]]] = None
+        self._compaction: Optional[asyncio.Task] = None
+        self.clear()
+
+    def clear(self):
+        self._state = _IndexState()
+        self._state.build()
+
+    async def load(self, db: AsyncIOMotorClient):
+        """Rebuild the index from active jobs, sorting it off the event loop."""
+        self._db = db
+        if self._compaction is not None:
+            await asyncio.gather(self._compaction, return_exceptions=True)
+        self._pending = {}
+        try:
+            projection = {field: 1 for field in SUGGEST_FIELDS}
+            projection.update({"id": 1, "status": 1, "views": 1, "applications_count": 1})
+            jobs = [job async for job in db.jobs.find({"status": JobStatus.ACTIVE.value}, projection, batch_size=1000)]
+            self._swap(await asyncio.to_thread(_IndexState.from_jobs, jobs))
+        finally:
+            self._pending = None
+
+    def upsert(self, job: Dict[str, Any]):
+        """Index a job, replacing its previous terms; non-active jobs are removed."""
+        self._state.set_job(job["id"], *terms_of(job))
+        if self._pending is not None:
+            self._pending[job["id"]] = job
+        self._compact_if_needed()
+
+    def remove(self, job_id: str):
+        self._state.set_job(job_id, 0.0, [])
+        if self._pending is not None:
+            self._pending[job_id] = None
+
+    def remove_many(self, job_ids: List[str]):
+        for job_id in job_ids:
+            self.remove(job_id)
+
+    async def apply_change(self, event: ChangeEvent):
+        """Change feed consumer for the ``jobs`` collection; ``invalidate`` reloads the index."""
+        if event.operation == "invalidate":
+            if self._db is not None:
+                await self.load(self._db)
+            else:
+                self.clear()
+        elif event.document is not None:
+            self.upsert(event.document)
+        elif event.document_id is not None:
+            self.remove(event.document_id)
+
+    def suggest(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Return up to ``limit`` suggestions for the typed prefix, best first."""
+        prefix = normalize(query)
+        if not prefix:
+            return []
+
+        state = self._state
+        return [
+            {"text": state.displays[v], "type": SUGGEST_FIELDS[state.fields[v]], "weight": round(state.weights[v], 2)}
+            for v in state.top(prefix, min(limit, self.max_limit))
+        ]
+
+    @property
+    def size(self) -> int:
+        """Number of entries in the sorted prefix array."""
+        return len(self._state.entry_values)
+
+    def _swap(self, state: _IndexState):
+        for job_id, job in (self._pending or {}).items():
+            if job is None:
+                state.set_job(job_id, 0.0, [])
+            else:
+                state.set_job(job_id, *terms_of(job))
+        self._state = state
+
+    def _compact_if_needed(self):
+        if len(self._state.overlay) <= self.overlay_limit or self._pending is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            state = self._state
+            self._state = _IndexState.from_terms(list(state.job_terms.items()), state)
+            return
+        self._pending = {}
+        self._compaction = loop.create_task(self._compact())
+
+    async def _compact(self):
+        try:
+            state = self._state
+            self._swap(await asyncio.to_thread(_IndexState.from_terms, list(state.job_terms.items()), state))
+        except Exception as e:
+            logger.error(f"Failed to compact the suggestion index: {str(e)}")
+        finally:
+            self._pending = None
+            self._compaction = None
+
+
+# Global suggestion index instance
+job_suggestions = SuggestionIndex()
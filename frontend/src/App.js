@@ -46,6 +46,16 @@ function App() {
     loadJobs();
   }, [token]);
 
+  // Receive newly posted jobs over server-sent events instead of polling
+  useEffect(() => {
+    const events = new EventSource(`${API}/stream`);
+    events.addEventListener('job', (event) => {
+      const job = JSON.parse(event.data);
+      setJobs(prevJobs => [job, ...prevJobs.filter(j => j.id !== job.id)]);
+    });
+    return () => events.close();
+  }, []);
+
   const verifyToken = async () => {
     try {
       const response = await axios.get(`${API}/auth/me`, {
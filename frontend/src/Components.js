@@ -1009,7 +1009,7 @@ const UserDashboard = ({ user, API }) => {
         })
       ]);
       
-      setNotifications(notificationsRes.data);
+      setNotifications(notificationsRes.data.items);
     } catch (error) {
       console.error('Failed to load dashboard data:', error);
     } finally {
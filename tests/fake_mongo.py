@@ -0,0 +1,396 @@
+"""In-memory stand-in for the subset of Motor the backend uses.
+
+Only for tests: no MongoDB server is needed. Documents are plain dicts,
+filters support equality (including array membership), dotted paths (also
+through arrays of subdocuments) and the operators the backend uses. Every
+collection counts the documents it writes so benchmarks can assert on write
+amplification.
+"""
+import asyncio
+import copy
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+from bson import ObjectId
+from pymongo import DeleteMany, DeleteOne, InsertOne, ReplaceOne, UpdateMany, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+
+_MISSING = object()
+
+
+def _get(document: Dict[str, Any], path: str) -> Any:
+    value: Any = document
+    for part in path.split("."):
+        if isinstance(value, dict):
+            value = value.get(part, _MISSING)
+        elif isinstance(value, list) and part.isdigit():
+            value = value[int(part)] if int(part) < len(value) else _MISSING
+        elif isinstance(value, list):
+            # "entries.job_id" matches against the field of every subdocument
+            value = [item[part] for item in value if isinstance(item, dict) and part in item] or _MISSING
+        else:
+            return _MISSING
+        if value is _MISSING:
+            return _MISSING
+    return value
+
+
+def _plain(value: Any) -> Any:
+    return getattr(value, "value", value)
+
+
+def _compare(value: Any, operator: str, operand: Any) -> bool:
+    if operator == "$eq":
+        return _equals(value, operand)
+    if operator == "$ne":
+        return not _equals(value, operand)
+    if operator == "$in":
+        return any(_equals(value, candidate) for candidate in operand)
+    if operator == "$nin":
+        return not any(_equals(value, candidate) for candidate in operand)
+    if operator == "$exists":
+        return (value is not _MISSING) == bool(operand)
+    if operator == "$size":
+        return isinstance(value, list) and len(value) == operand
+    if value is _MISSING or value is None:
+        return False
+    values = value if isinstance(value, list) else [value]
+    checks = {
+        "$gt": lambda v: _plain(v) > _plain(operand),
+        "$gte": lambda v: _plain(v) >= _plain(operand),
+        "$lt": lambda v: _plain(v) < _plain(operand),
+        "$lte": lambda v: _plain(v) <= _plain(operand),
+    }
+    if operator not in checks:
+        raise NotImplementedError(operator)
+    return any(checks[operator](v) for v in values)
+
+
+def _equals(value: Any, operand: Any) -> bool:
+    if value is _MISSING:
+        return operand is None
+    if isinstance(value, list) and not isinstance(operand, list):
+        return any(_plain(item) == _plain(operand) for item in value)
+    return _plain(value) == _plain(operand)
+
+
+def matches(document: Dict[str, Any], query: Optional[Dict[str, Any]]) -> bool:
+    for key, condition in (query or {}).items():
+        if key == "$or":
+            if not any(matches(document, sub) for sub in condition):
+                return False
+        elif key == "$and":
+            if not all(matches(document, sub) for sub in condition):
+                return False
+        elif isinstance(condition, dict) and condition and all(k.startswith("$") for k in condition):
+            value = _get(document, key)
+            if not all(_compare(value, op, operand) for op, operand in condition.items()):
+                return False
+        elif not _equals(_get(document, key), condition):
+            return False
+    return True
+
+
+def _project(document: Dict[str, Any], projection: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    document = copy.deepcopy(document)
+    if not projection:
+        return document
+    included = [field for field, flag in projection.items() if flag and field != "_id"]
+    if included:
+        projected = {field: document[field] for field in included if field in document}
+        if projection.get("_id", 1) and "_id" in document:
+            projected["_id"] = document["_id"]
+        return projected
+    for field, flag in projection.items():
+        if not flag:
+            document.pop(field, None)
+    return document
+
+
+def _sort_key(value: Any):
+    value = _plain(value)
+    if value is _MISSING or value is None:
+        return (0, 0)
+    if isinstance(value, ObjectId):
+        return (1, str(value))
+    return (1, value)
+
+
+class FakeCursor:
+    def __init__(
+        self,
+        documents: List[Dict[str, Any]],
+        projection: Optional[Dict[str, Any]],
+        query: Optional[Dict[str, Any]] = None,
+        batch_size: int = 101,
+    ):
+        self._documents = documents
+        self._projection = projection
+        self._query = query
+        self._batch_size = batch_size or 101
+        self._sort: List = []
+        self._skip = 0
+        self._limit = 0
+
+    def sort(self, key_or_list, direction: int = 1):
+        self._sort = [(key_or_list, direction)] if isinstance(key_or_list, str) else list(key_or_list)
+        return self
+
+    def skip(self, count: int):
+        self._skip = count
+        return self
+
+    def limit(self, count: int):
+        self._limit = count
+        return self
+
+    def _results(self) -> List[Dict[str, Any]]:
+        documents = [doc for doc in self._documents if matches(doc, self._query)]
+        for field, direction in reversed(self._sort):
+            documents.sort(key=lambda doc: _sort_key(_get(doc, field)), reverse=direction < 0)
+        documents = documents[self._skip:]
+        if self._limit:
+            documents = documents[:self._limit]
+        return [_project(doc, self._projection) for doc in documents]
+
+    async def to_list(self, length: Optional[int] = None) -> List[Dict[str, Any]]:
+        results = self._results()
+        return results[:length] if length else results
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        if self._sort or self._skip or self._limit:
+            for document in self._results():
+                yield document
+            return
+        # Unsorted scans stream and yield to the event loop between batches, like a server cursor
+        for position, document in enumerate(self._documents):
+            if position and position % self._batch_size == 0:
+                await asyncio.sleep(0)
+            if matches(document, self._query):
+                yield _project(document, self._projection)
+
+
+class FakeCollection:
+    def __init__(self, name: str):
+        self.name = name
+        self.documents: List[Dict[str, Any]] = []
+        self.unique_indexes: List[List[str]] = []
+        self.indexes: List[Dict[str, Any]] = []
+        self.writes = 0
+
+    # Reads
+
+    def find(self, query: Optional[Dict[str, Any]] = None, projection: Optional[Dict[str, Any]] = None, **kwargs):
+        return FakeCursor(list(self.documents), projection, query, kwargs.get("batch_size", 101))
+
+    async def find_one(self, query: Optional[Dict[str, Any]] = None, projection: Optional[Dict[str, Any]] = None):
+        for document in self.documents:
+            if matches(document, query):
+                return _project(document, projection)
+        return None
+
+    async def count_documents(self, query: Dict[str, Any]) -> int:
+        return sum(1 for doc in self.documents if matches(doc, query))
+
+    def watch(self, *args, **kwargs):
+        raise OperationFailure("The $changeStream stage is only supported on replica sets", code=40573)
+
+    # Writes
+
+    async def create_index(self, keys, unique: bool = False, **kwargs) -> str:
+        fields = [keys] if isinstance(keys, str) else [field for field, _ in keys]
+        if unique:
+            self.unique_indexes.append(fields)
+        self.indexes.append({"keys": fields, "unique": unique, **kwargs})
+        return "_".join(fields)
+
+    async def insert_one(self, document: Dict[str, Any]):
+        self._insert(document)
+        return SimpleNamespace(inserted_id=document["_id"])
+
+    async def insert_many(self, documents: List[Dict[str, Any]], ordered: bool = True):
+        errors = []
+        for index, document in enumerate(documents):
+            try:
+                self._insert(document)
+            except DuplicateKeyError:
+                errors.append({"index": index, "code": 11000})
+                if ordered:
+                    break
+        if errors:
+            raise BulkWriteError({"writeErrors": errors})
+        return SimpleNamespace(inserted_ids=[doc["_id"] for doc in documents])
+
+    async def update_one(self, query, update, upsert: bool = False):
+        return self._update(query, update, upsert, many=False)
+
+    async def update_many(self, query, update, upsert: bool = False):
+        return self._update(query, update, upsert, many=True)
+
+    async def replace_one(self, query, replacement, upsert: bool = False):
+        return self._replace(query, replacement, upsert)
+
+    async def find_one_and_update(self, query, update, upsert: bool = False, return_document: bool = False, **kwargs):
+        before = await self.find_one(query)
+        self._update(query, update, upsert, many=False)
+        if return_document:
+            return await self.find_one({"_id": before["_id"]} if before else query)
+        return before
+
+    async def delete_one(self, query):
+        return self._delete(query, many=False)
+
+    async def delete_many(self, query):
+        return self._delete(query, many=True)
+
+    async def bulk_write(self, operations, ordered: bool = True):
+        for operation in operations:
+            if isinstance(operation, InsertOne):
+                self._insert(operation._doc)
+            elif isinstance(operation, (UpdateOne, UpdateMany)):
+                self._update(operation._filter, operation._doc, operation._upsert, isinstance(operation, UpdateMany))
+            elif isinstance(operation, ReplaceOne):
+                self._replace(operation._filter, operation._doc, operation._upsert)
+            elif isinstance(operation, (DeleteOne, DeleteMany)):
+                self._delete(operation._filter, isinstance(operation, DeleteMany))
+            else:
+                raise NotImplementedError(type(operation).__name__)
+        return SimpleNamespace(acknowledged=True)
+
+    def _insert(self, document: Dict[str, Any]):
+        generated_id = "_id" not in document
+        document.setdefault("_id", ObjectId())
+        self._check_unique(document, check_id=not generated_id)
+        self.documents.append(copy.deepcopy(document))
+        self.writes += 1
+
+    def _check_unique(self, document: Dict[str, Any], ignore: Optional[Dict[str, Any]] = None, check_id: bool = False):
+        for fields in ([["_id"]] if check_id else []) + self.unique_indexes:
+            key = [_get(document, field) for field in fields]
+            if all(value is _MISSING for value in key):
+                continue
+            for other in self.documents:
+                if other is not ignore and [_get(other, field) for field in fields] == key:
+                    raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name}")
+
+    def _update(self, query, update, upsert: bool, many: bool):
+        matched = [doc for doc in self.documents if matches(doc, query)]
+        if not many:
+            matched = matched[:1]
+        upserted_id = None
+        if not matched and upsert:
+            document = {k: v for k, v in query.items() if not k.startswith("$") and not isinstance(v, dict)}
+            _apply_update(document, update, inserting=True)
+            self._insert(document)
+            upserted_id = document["_id"]
+        modified = 0
+        for document in matched:
+            before = copy.deepcopy(document)
+            _apply_update(document, update, inserting=False)
+            if document != before:
+                self._check_unique(document, ignore=document)
+                modified += 1
+                self.writes += 1
+        return SimpleNamespace(matched_count=len(matched), modified_count=modified, upserted_id=upserted_id)
+
+    def _replace(self, query, replacement, upsert: bool):
+        for index, document in enumerate(self.documents):
+            if matches(document, query):
+                replacement = copy.deepcopy(replacement)
+                replacement.setdefault("_id", document["_id"])
+                self.documents[index] = replacement
+                self.writes += 1
+                return SimpleNamespace(matched_count=1, modified_count=1, upserted_id=None)
+        if upsert:
+            self._insert(copy.deepcopy(replacement))
+        return SimpleNamespace(matched_count=0, modified_count=0, upserted_id=None)
+
+    def _delete(self, query, many: bool):
+        deleted = 0
+        remaining = []
+        for document in self.documents:
+            if matches(document, query) and (many or not deleted):
+                deleted += 1
+            else:
+                remaining.append(document)
+        self.documents = remaining
+        self.writes += deleted
+        return SimpleNamespace(deleted_count=deleted)
+
+
+def _apply_update(document: Dict[str, Any], update: Dict[str, Any], inserting: bool):
+    for operator, fields in update.items():
+        for path, value in fields.items():
+            parent, _, field = path.rpartition(".")
+            target = _get(document, parent) if parent else document
+            if target is _MISSING:
+                target = document
+                for part in parent.split("."):
+                    target = target.setdefault(part, {})
+            current = target.get(field, _MISSING)
+            if operator == "$set":
+                target[field] = copy.deepcopy(value)
+            elif operator == "$setOnInsert":
+                if inserting:
+                    target[field] = copy.deepcopy(value)
+            elif operator == "$unset":
+                target.pop(field, None)
+            elif operator == "$inc":
+                target[field] = (0 if current is _MISSING else current) + value
+            elif operator == "$max":
+                if current is _MISSING or _plain(value) > _plain(current):
+                    target[field] = value
+            elif operator == "$min":
+                if current is _MISSING or _plain(value) < _plain(current):
+                    target[field] = value
+            elif operator == "$addToSet":
+                items = target.setdefault(field, [])
+                for item in value["$each"] if isinstance(value, dict) and "$each" in value else [value]:
+                    if item not in items:
+                        items.append(item)
+            elif operator == "$push":
+                items = target.setdefault(field, [])
+                if isinstance(value, dict) and "$each" in value:
+                    items.extend(copy.deepcopy(value["$each"]))
+                    for key, direction in reversed(list(value.get("$sort", {}).items())):
+                        items.sort(key=lambda item: _sort_key(_get(item, key)), reverse=direction < 0)
+                    if "$slice" in value:
+                        del items[value["$slice"]:]
+                else:
+                    items.append(copy.deepcopy(value))
+            elif operator == "$pull":
+                items = target.get(field, [])
+                if isinstance(value, dict) and all(key.startswith("$") for key in value):
+                    target[field] = [
+                        item for item in items if not all(_compare(item, op, operand) for op, operand in value.items())
+                    ]
+                elif isinstance(value, dict):
+                    target[field] = [item for item in items if not matches(item, value)]
+                else:
+                    target[field] = [item for item in items if item != value]
+            else:
+                raise NotImplementedError(operator)
+
+
+class FakeDatabase:
+    """Attribute or item access returns a (lazily created) collection."""
+
+    def __init__(self):
+        self._collections: Dict[str, FakeCollection] = {}
+
+    def __getattr__(self, name: str) -> FakeCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def __getitem__(self, name: str) -> FakeCollection:
+        if name not in self._collections:
+            self._collections[name] = FakeCollection(name)
+        return self._collections[name]
+
+    def writes(self) -> Dict[str, int]:
+        return {name: collection.writes for name, collection in self._collections.items()}
+
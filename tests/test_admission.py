@@ -0,0 +1,109 @@
+"""Burst benchmark for the apply path: bounded concurrency and graceful 503s."""
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta
+
+import httpx
+
+from admission import AdmissionController, AdmissionRejected
+
+
+class ConcurrencyProbe:
+    def __init__(self):
+        self.active = 0
+        self.peak = 0
+
+    async def hold(self, seconds: float):
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            self.active -= 1
+
+
+def test_burst_is_bounded_and_sheds_load_with_retry_after():
+    controller = AdmissionController(
+        max_concurrency=8, per_job_concurrency=4, per_job_queue_limit=50, max_wait_seconds=0.5
+    )
+    overall = ConcurrencyProbe()
+    per_job = {"hot": ConcurrencyProbe(), "quiet": ConcurrencyProbe()}
+    outcomes = {"hot": [], "quiet": []}
+
+    async def apply(job_id):
+        try:
+            async with controller.slot(job_id):
+                await asyncio.gather(overall.hold(0.01), per_job[job_id].hold(0.01))
+            outcomes[job_id].append("ok")
+        except AdmissionRejected as e:
+            outcomes[job_id].append(e.retry_after)
+
+    async def burst():
+        # 500 applications for one job arrive together with a trickle for another
+        tasks = [apply("hot") for _ in range(500)] + [apply("quiet") for _ in range(20)]
+        started = time.perf_counter()
+        await asyncio.gather(*tasks)
+        return time.perf_counter() - started
+
+    elapsed = asyncio.run(burst())
+
+    assert overall.peak <= 8
+    assert per_job["hot"].peak <= 4
+    rejected = [r for r in outcomes["hot"] if r != "ok"]
+    assert rejected, "the hot job's queue should overflow"
+    assert all(retry_after >= 1 for retry_after in rejected)
+    assert outcomes["hot"].count("ok") >= 50
+    # Round-robin dispatch keeps the quiet job flowing despite the hot one
+    assert outcomes["quiet"] == ["ok"] * 20
+    assert controller.stats()["active"] == 0 and controller.stats()["queued"] == 0
+    # Excess load is shed quickly instead of piling up
+    assert elapsed < 5
+    print(f"\n500+20 applications in {elapsed:.2f}s, {len(rejected)} rejected, peak concurrency {overall.peak}")
+
+
+def test_apply_endpoint_returns_503_with_retry_after_under_burst(db, monkeypatch):
+    import server
+
+    job_id = str(uuid.uuid4())
+    db.jobs.documents.append({
+        "id": job_id,
+        "title": "SSC GD Constable 2025",
+        "status": "active",
+        "application_end_date": datetime.utcnow() + timedelta(days=1),
+        "applications_count": 0,
+    })
+
+    # Slow down the duplicate check so admitted requests hold their slot
+    probe = ConcurrencyProbe()
+    original_find_one = db.applications.find_one
+
+    async def slow_find_one(*args, **kwargs):
+        await probe.hold(0.02)
+        return await original_find_one(*args, **kwargs)
+
+    monkeypatch.setattr(db.applications, "find_one", slow_find_one)
+    monkeypatch.setattr(server, "apply_admission", AdmissionController(
+        max_concurrency=4, per_job_concurrency=4, per_job_queue_limit=10, max_wait_seconds=1.0
+    ))
+    server.job_cache.invalidate(job_id)
+    server.app.dependency_overrides[server.get_database] = lambda: db
+    try:
+        async def burst():
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return await asyncio.gather(*(client.post(f"/api/jobs/{job_id}/apply") for _ in range(100)))
+
+        responses = asyncio.run(burst())
+    finally:
+        server.app.dependency_overrides.clear()
+
+    codes = [response.status_code for response in responses]
+    assert codes.count(200) == 1
+    # The mocked user can only apply once; everything else is a clean 400 or 503
+    assert set(codes) <= {200, 400, 503}
+    shed = [response for response in responses if response.status_code == 503]
+    assert shed
+    assert all(int(response.headers["Retry-After"]) >= 1 for response in shed)
+    assert probe.peak <= 4
+    assert len(db.applications.documents) == 1
@@ -0,0 +1,157 @@
+"""Archiving closed jobs: resumable batches, reopened jobs, and reads that fall back to the archive."""
+import asyncio
+import csv
+import io
+from datetime import datetime, timedelta
+
+import httpx
+import pytest
+
+from archive import JobArchiver
+from models import Job, User, UserRole
+
+NOW = datetime.utcnow().replace(microsecond=0)
+
+
+def make_job(title, status="closed", ended_days_ago=400):
+    job = Job(
+        title=title,
+        organization="Railway Recruitment Board",
+        description=f"{title} notification",
+        category="railway",
+        location="All India",
+        state="Delhi",
+        min_education="12th",
+        total_posts=100,
+        application_start_date=NOW - timedelta(days=ended_days_ago + 30),
+        application_end_date=NOW - timedelta(days=ended_days_ago),
+        created_by="admin",
+    ).dict()
+    job["status"] = status
+    return job
+
+
+def add_applications(db, job, count):
+    db.applications.documents.extend(
+        {"id": f"{job['id']}-app-{n}", "job_id": job["id"], "user_id": f"user-{n}", "status": "pending",
+         "applied_at": NOW - timedelta(days=420)}
+        for n in range(count)
+    )
+
+
+@pytest.fixture
+def jobs(db):
+    old = [make_job(f"RRB Group D 20{n:02d}") for n in range(5)]
+    recent = make_job("RRB NTPC 2025", ended_days_ago=10)
+    active = make_job("RRB ALP 2025", status="active", ended_days_ago=-30)
+    db.jobs.documents.extend(old + [recent, active])
+    for job in old + [recent, active]:
+        add_applications(db, job, 3)
+    return old, recent, active
+
+
+def ids(collection):
+    return sorted(document["id"] for document in collection.documents)
+
+
+def test_run_moves_old_closed_jobs_and_a_second_run_adds_nothing(db, jobs):
+    old, recent, active = jobs
+    archiver = JobArchiver(retention_days=180, batch_size=2, application_batch_size=4)
+
+    summary = asyncio.run(archiver.run(db, NOW))
+
+    assert summary["archived_jobs"] == 5 and summary["archived_applications"] == 15
+    assert ids(db.jobs) == sorted([recent["id"], active["id"]])
+    assert ids(db.jobs_archive) == sorted(job["id"] for job in old)
+    assert {app["job_id"] for app in db.applications.documents} == {recent["id"], active["id"]}
+    assert len(db.applications_archive.documents) == 15
+    run = asyncio.run(archiver.get_run(db, summary["run_id"]))
+    assert run["finished"] and "pending_job_ids" not in run
+
+    archive_writes = (db.writes().get("jobs_archive", 0), db.writes().get("applications_archive", 0))
+    again = asyncio.run(archiver.run(db, NOW))
+    assert again["archived_jobs"] == 0 and again["archived_applications"] == 0
+    assert (db.writes().get("jobs_archive", 0), db.writes().get("applications_archive", 0)) == archive_writes
+    assert len(db.jobs_archive.documents) == 5 and len(db.applications_archive.documents) == 15
+
+
+def test_interrupted_batch_is_finished_by_the_next_run(db, jobs, monkeypatch):
+    old, _, _ = jobs
+    archiver = JobArchiver(retention_days=180, batch_size=10)
+    delete_applications = db.applications.delete_many
+
+    async def crash(*args, **kwargs):
+        raise ConnectionError("primary stepped down")
+
+    # Jobs are deleted, then the process dies before their applications are
+    monkeypatch.setattr(db.applications, "delete_many", crash)
+    with pytest.raises(ConnectionError):
+        asyncio.run(archiver.run(db, NOW))
+    interrupted = [run for run in db.archive_runs.documents if "pending_job_ids" in run]
+    assert len(interrupted) == 1
+    assert not set(ids(db.jobs)) & {job["id"] for job in old}
+    assert len(db.applications.documents) == 21
+
+    monkeypatch.setattr(db.applications, "delete_many", delete_applications)
+    summary = asyncio.run(archiver.run(db, NOW))
+
+    assert summary["archived_jobs"] == 0
+    assert not any("pending_job_ids" in run for run in db.archive_runs.documents)
+    assert len(db.applications.documents) == 6
+    assert len(db.applications_archive.documents) == 15
+
+
+def test_job_reopened_between_copy_and_delete_stays_hot(db, jobs, monkeypatch):
+    old, _, _ = jobs
+    reopened = old[0]
+    archiver = JobArchiver(retention_days=180, batch_size=10)
+    delete_jobs = db.jobs.delete_many
+
+    async def reopen_then_delete(query, *args, **kwargs):
+        # An admin reopens the job after it was copied but before the delete
+        next(job for job in db.jobs.documents if job["id"] == reopened["id"])["status"] = "active"
+        return await delete_jobs(query, *args, **kwargs)
+
+    monkeypatch.setattr(db.jobs, "delete_many", reopen_then_delete)
+    summary = asyncio.run(archiver.run(db, NOW))
+
+    assert reopened["id"] in ids(db.jobs)
+    assert reopened["id"] not in ids(db.jobs_archive)
+    assert not any(app["job_id"] == reopened["id"] for app in db.applications_archive.documents)
+    assert sum(app["job_id"] == reopened["id"] for app in db.applications.documents) == 3
+    assert len(db.jobs_archive.documents) == 4
+    assert summary["run_id"]
+
+
+def test_api_runs_archive_in_background_and_reads_fall_back(db, jobs, monkeypatch):
+    import server
+
+    old, _, _ = jobs
+    monkeypatch.setattr(server, "job_archiver", JobArchiver(retention_days=180))
+    server.app.dependency_overrides[server.get_database] = lambda: db
+    server.app.dependency_overrides[server.require_admin] = lambda: User(
+        email="admin@example.com", full_name="Admin", role=UserRole.ADMIN
+    )
+    try:
+        async def scenario():
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                started = await client.post("/api/admin/archive")
+                assert started.status_code == 202
+                run_id = started.json()["run_id"]
+                # The run is recorded before the request returns; the work happens after it
+                progress = await client.get(f"/api/admin/archive/{run_id}")
+                assert progress.status_code == 200
+                assert progress.json()["finished"] and progress.json()["archived_jobs"] == 5
+                assert (await client.get("/api/admin/archive/nope")).status_code == 404
+
+                job = await client.get(f"/api/jobs/{old[0]['id']}")
+                assert job.status_code == 200 and job.json()["title"] == old[0]["title"]
+                return await client.get(f"/api/admin/jobs/{old[0]['id']}/applications/export")
+
+        export = asyncio.run(scenario())
+    finally:
+        server.app.dependency_overrides.clear()
+
+    rows = list(csv.DictReader(io.StringIO(export.text)))
+    assert sorted(row["application_id"] for row in rows) == [f"{old[0]['id']}-app-{n}" for n in range(3)]
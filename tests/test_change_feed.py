@@ -0,0 +1,232 @@
+"""Change feed delivery and the consumers that keep per-worker state in step with it."""
+import asyncio
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from change_feed import ChangeEvent, ChangeFeed
+
+
+def make_job(title, organization, category="banking", state="Gujarat", **fields):
+    job = {
+        "_id": ObjectId(),
+        "id": str(uuid.uuid4()),
+        "title": title,
+        "organization": organization,
+        "description": f"{organization} invites applications for {title}.",
+        "category": category,
+        "state": state,
+        "location": state,
+        "min_education": "graduate",
+        "salary_min": 25000,
+        "status": "active",
+        "views": 0,
+        "applications_count": 0,
+        "created_at": datetime.utcnow(),
+        "updated_at": datetime.utcnow(),
+        "application_end_date": datetime.utcnow() + timedelta(days=10),
+    }
+    job.update(fields)
+    return job
+
+
+@pytest.fixture
+def portal(db, monkeypatch):
+    """The server's global change feed and consumers, loaded from a fake database."""
+    import server
+
+    monkeypatch.setattr(server, "db", db)
+    jobs = [
+        make_job("Bank of Baroda LBO Online Form 2025", "Bank of Baroda"),
+        make_job("RRB NTPC Graduate Level 2025", "Railway Recruitment Board", category="railway", state="Bihar"),
+    ]
+    db.jobs.documents.extend(jobs)
+
+    async def load():
+        for index in server.job_indexes:
+            await index.load(db)
+
+    asyncio.run(load())
+    server.job_cache.clear()
+    for job in jobs:
+        server.job_cache.set(job["id"], job)
+    yield server, jobs
+    server.job_cache.clear()
+    for index in server.job_indexes:
+        index.clear()
+
+
+def suggested_titles(server, prefix):
+    return [s["text"] for s in server.job_suggestions.suggest(prefix) if s["type"] == "title"]
+
+
+def test_insert_and_close_reach_every_job_consumer(portal):
+    server, _ = portal
+    new_job = make_job("SBI Clerk Junior Associate 2025", "State Bank of India", state="Delhi")
+
+    asyncio.run(server.change_feed.simulate("jobs", "insert", new_job))
+    assert server.job_facets.counts({})["total"] == 3
+    assert suggested_titles(server, "sbi clerk") == ["SBI Clerk Junior Associate 2025"]
+    assert server.job_duplicates.find_duplicate(make_job(new_job["title"], new_job["organization"]))[0] == new_job["id"]
+    assert asyncio.run(server.job_cache.get(None, new_job["id"]))["title"] == new_job["title"]
+
+    closed = dict(new_job, status="closed")
+    asyncio.run(server.change_feed.simulate("jobs", "update", closed))
+    assert server.job_facets.counts({})["total"] == 2
+    assert suggested_titles(server, "sbi clerk") == []
+    assert server.job_duplicates.find_duplicate(make_job(new_job["title"], new_job["organization"])) is None
+
+
+def test_delete_removes_the_job_from_every_consumer(portal):
+    server, jobs = portal
+    deleted = jobs[0]
+
+    asyncio.run(server.change_feed.simulate("jobs", "delete", document_id=deleted["id"]))
+
+    assert server.job_facets.counts({})["total"] == 1
+    assert server.job_facets.counts({"category": "banking"})["total"] == 0
+    assert suggested_titles(server, "bank of baroda") == []
+    assert server.job_duplicates.find_duplicate(make_job(deleted["title"], deleted["organization"])) is None
+    assert deleted["id"] not in server.job_cache._entries
+
+
+def test_invalidate_reloads_the_indexes_from_the_database(portal, db):
+    server, jobs = portal
+    # Changes the feed never delivered: one job closed, one posted
+    jobs[0]["status"] = "closed"
+    missed = make_job("SSC CGL 2025", "Staff Selection Commission", category="ssc", state="Delhi")
+    db.jobs.documents.append(missed)
+
+    asyncio.run(server.change_feed.simulate("jobs", "invalidate"))
+
+    assert server.job_facets.counts({})["total"] == 2
+    assert server.job_facets.counts({"category": "banking"})["total"] == 0
+    assert server.job_facets.counts({"category": "ssc"})["total"] == 1
+    assert suggested_titles(server, "bank of baroda") == []
+    assert suggested_titles(server, "ssc cgl") == ["SSC CGL 2025"]
+    assert server.job_duplicates.find_duplicate(make_job(jobs[0]["title"], jobs[0]["organization"])) is None
+    assert server.job_duplicates.find_duplicate(make_job(missed["title"], missed["organization"]))[0] == missed["id"]
+
+
+def test_profile_change_drops_the_users_feed(portal, db):
+    server, _ = portal
+    user = {"id": "u1", "preferred_job_categories": ["banking"], "education_level": "graduate", "location": "Gujarat"}
+    db.users.documents.append(dict(user))
+    asyncio.run(server.feed_builder.build(db, "u1"))
+
+    # A login bumps the user document but leaves the profile alone
+    asyncio.run(server.change_feed.simulate("users", "update", dict(user, last_login=datetime.utcnow())))
+    assert len(db.feeds.documents) == 1
+
+    asyncio.run(server.change_feed.simulate("users", "update", dict(user, preferred_job_categories=["railway"])))
+    assert db.feeds.documents == []
+
+
+def fake_change_stream(changes):
+    class Stream:
+        resume_token = {"_data": "token"}
+
+        def __aiter__(self):
+            return self._iterate()
+
+        async def _iterate(self):
+            for change in changes:
+                yield change
+
+    @asynccontextmanager
+    async def watch(pipeline, **kwargs):
+        watch.pipeline = pipeline
+        watch.calls.append(kwargs)
+        yield Stream()
+
+    watch.calls = []
+
+    return watch
+
+
+def test_change_stream_names_deleted_documents_and_filters_counter_updates(db, monkeypatch):
+    existing = make_job("UPSC Civil Services 2025", "UPSC")
+    db.jobs.documents.append(existing)
+    inserted = make_job("IBPS PO 2025", "IBPS")
+    watch = fake_change_stream([
+        {"operationType": "insert", "documentKey": {"_id": inserted["_id"]}, "fullDocument": inserted},
+        {"operationType": "delete", "documentKey": {"_id": existing["_id"]}},
+        {"operationType": "delete", "documentKey": {"_id": inserted["_id"]}},
+    ])
+    monkeypatch.setattr(db.jobs, "watch", watch)
+
+    feed = ChangeFeed(collections=["jobs"], ignored_update_fields={"jobs": ["views"]})
+    received = []
+    feed.register("jobs", received.append)
+    asyncio.run(feed._watch(db, "jobs"))
+
+    assert [(e.operation, e.document_id) for e in received] == [
+        ("insert", inserted["id"]),
+        ("delete", existing["id"]),
+        ("delete", inserted["id"]),
+    ]
+    ignored = watch.pipeline[0]["$match"]["$or"][2]["$expr"]["$gt"][0]["$size"]["$setDifference"][1]
+    assert ignored == ["views"]
+
+
+def test_polling_fallback_delivers_updates_after_the_start_position(db):
+    old = make_job("Old notice", "SSC", updated_at=datetime.utcnow() - timedelta(hours=1))
+    db.jobs.documents.append(old)
+    feed = ChangeFeed(collections=["jobs"], poll_interval=0.01)
+    received = []
+    feed.register("jobs", received.append)
+
+    async def scenario():
+        await feed.start(db)
+        await asyncio.sleep(0.05)
+        db.jobs.documents.append(make_job("New notice", "SSC"))
+        old["title"] = "Old notice (corrigendum)"
+        old["updated_at"] = datetime.utcnow() + timedelta(seconds=1)
+        await asyncio.sleep(0.05)
+        await feed.stop()
+
+    asyncio.run(scenario())
+    assert [e.document["title"] for e in received] == ["New notice", "Old notice (corrigendum)"]
+    assert all(isinstance(e, ChangeEvent) and e.operation == "update" for e in received)
+
+
+def test_changes_made_during_warm_up_are_replayed_when_polling(db):
+    db.jobs.documents.append(make_job("Old notice", "SSC", updated_at=datetime.utcnow() - timedelta(hours=1)))
+    feed = ChangeFeed(collections=["jobs"], poll_interval=0.01)
+    received = []
+    feed.register("jobs", received.append)
+
+    async def scenario():
+        await feed.mark_positions(db)
+        # Written after the position was marked, while the snapshot loads
+        db.jobs.documents.append(make_job("Posted during warm-up", "SSC"))
+        await feed.start(db)
+        await asyncio.sleep(0.05)
+        await feed.stop()
+
+    asyncio.run(scenario())
+    assert [e.document["title"] for e in received] == ["Posted during warm-up"]
+
+
+def test_change_stream_resumes_from_the_marked_token(db, monkeypatch):
+    existing = make_job("UPSC Civil Services 2025", "UPSC")
+    db.jobs.documents.append(existing)
+    watch = fake_change_stream([{"operationType": "delete", "documentKey": {"_id": existing["_id"]}}])
+    monkeypatch.setattr(db.jobs, "watch", watch)
+    feed = ChangeFeed(collections=["jobs"])
+    received = []
+    feed.register("jobs", received.append)
+
+    async def scenario():
+        await feed.mark_positions(db)
+        # Deleted before tailing started: still named from the map taken with the token
+        db.jobs.documents.remove(existing)
+        await feed._watch(db, "jobs")
+
+    asyncio.run(scenario())
+    assert watch.calls[0].get("resume_after") is None
+    assert watch.calls[1]["resume_after"] == {"_data": "token"}
+    assert [(e.operation, e.document_id) for e in received] == [("delete", existing["id"])]
@@ -0,0 +1,181 @@
+"""Duplicate detection: reworded re-posts match, sibling notices don't, and duplicates stay quiet."""
+import asyncio
+import os
+import random
+import time
+from datetime import datetime, timedelta
+
+import httpx
+
+from dedup import DuplicateDetector
+
+BENCHMARK_JOBS = int(os.getenv("BENCHMARK_JOBS", "100000"))
+
+BHEL = {
+    "id": "bhel-1",
+    "title": "BHEL 515 Artisan Online Form 2025",
+    "organization": "Bharat Heavy Electricals Limited",
+    "description": "Bharat Heavy Electricals Limited has released a notification for 515 Artisan posts. "
+                   "Candidates with ITI in Fitter, Welder, Turner, Machinist, Electrician and Electronics "
+                   "Mechanic trades can apply online before the last date.",
+    "status": "active",
+}
+BHEL_REPOST = {
+    "id": "bhel-2",
+    "title": "BHEL Artisan 515 Posts 2025",
+    "organization": "Bharat Heavy Electricals Limited",
+    "description": "BHEL invites online applications for 515 Artisan vacancies. ITI holders in Fitter, Welder, "
+                   "Turner, Machinist, Electrician and Electronics Mechanic trades are eligible; apply online "
+                   "before the last date.",
+    "status": "active",
+}
+SSC_CGL = {
+    "id": "ssc-cgl",
+    "title": "SSC CGL 2025",
+    "organization": "Staff Selection Commission",
+    "description": "Staff Selection Commission Combined Graduate Level examination 2025 for Group B and C "
+                   "posts in ministries and departments.",
+    "status": "active",
+}
+SSC_CHSL = {
+    "id": "ssc-chsl",
+    "title": "SSC CHSL 2025",
+    "organization": "Staff Selection Commission",
+    "description": "Staff Selection Commission Combined Higher Secondary Level examination 2025 for Group C "
+                   "posts in ministries and departments.",
+    "status": "active",
+}
+
+
+def test_reworded_repost_is_a_duplicate():
+    detector = DuplicateDetector()
+    detector.upsert(BHEL)
+
+    match = detector.find_duplicate(BHEL_REPOST)
+    assert match is not None and match[0] == "bhel-1"
+    assert match[1] >= detector.threshold
+
+    # A closed job leaves the index and no longer catches re-posts
+    detector.upsert({**BHEL, "status": "closed"})
+    assert detector.find_duplicate(BHEL_REPOST) is None
+
+
+def test_sibling_notices_are_kept_apart_by_title():
+    detector = DuplicateDetector()
+    detector.upsert(SSC_CGL)
+    assert detector.find_duplicate(SSC_CHSL) is None
+
+    # The descriptions alone look alike; only the title check separates them
+    lenient = DuplicateDetector(title_threshold=0.0)
+    lenient.upsert(SSC_CGL)
+    assert lenient.find_duplicate(SSC_CHSL)[0] == "ssc-cgl"
+
+
+def test_backfill_marks_later_postings(db):
+    now = datetime.utcnow()
+    db.jobs.documents.extend([
+        {**BHEL_REPOST, "created_at": now},
+        {**BHEL, "created_at": now - timedelta(days=2)},
+        {**SSC_CGL, "created_at": now - timedelta(days=1)},
+        {**SSC_CHSL, "created_at": now},
+    ])
+    detector = DuplicateDetector()
+
+    report = asyncio.run(detector.backfill(db))
+    assert [(d["job_id"], d["duplicate_of"]) for d in report] == [("bhel-2", "bhel-1")]
+    assert not any("duplicate_of" in job for job in db.jobs.documents)
+
+    asyncio.run(detector.backfill(db, mark=True))
+    marked = {job["id"]: job.get("duplicate_of") for job in db.jobs.documents}
+    assert marked == {"bhel-2": "bhel-1", "bhel-1": None, "ssc-cgl": None, "ssc-chsl": None}
+    # The scan runs on a private index
+    assert detector.find_duplicate(BHEL_REPOST) is None
+
+
+def test_create_job_skips_notifications_for_a_duplicate(db, monkeypatch):
+    import server
+
+    detector = DuplicateDetector()
+    detector.upsert(BHEL)
+    monkeypatch.setattr(server, "job_duplicates", detector)
+    monkeypatch.setattr(server, "job_indexes", [detector])
+    calls = []
+
+    async def record_publish(job):
+        calls.append(("publish", job["id"]))
+
+    async def record_alerts(db, job):
+        calls.append(("alerts", job.id))
+
+    async def record_feeds(db, job):
+        calls.append(("feeds", job["id"]))
+
+    monkeypatch.setattr(server.event_broker, "publish_job", record_publish)
+    monkeypatch.setattr(server, "send_job_alerts_to_users", record_alerts)
+    monkeypatch.setattr(server, "add_job_to_feeds", record_feeds)
+
+    now = datetime.utcnow()
+
+    def payload(job):
+        return {
+            "title": job["title"], "organization": job["organization"], "description": job["description"],
+            "category": "engineering", "location": "Bhopal", "state": "Madhya Pradesh",
+            "min_education": "iti", "total_posts": 515,
+            "application_start_date": now.isoformat(), "application_end_date": (now + timedelta(days=30)).isoformat(),
+        }
+
+    server.app.dependency_overrides[server.get_database] = lambda: db
+    try:
+        async def scenario():
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                repost = await client.post("/api/jobs", json=payload(BHEL_REPOST))
+                fresh = await client.post("/api/jobs", json=payload(SSC_CGL))
+                return repost.json(), fresh.json()
+
+        repost, fresh = asyncio.run(scenario())
+    finally:
+        server.app.dependency_overrides.clear()
+
+    assert repost["duplicate_of"] == "bhel-1"
+    assert fresh["duplicate_of"] is None
+    # The duplicate is stored and indexed, but only the new notice is announced
+    assert len(db.jobs.documents) == 2
+    assert sorted(calls) == [("alerts", fresh["id"]), ("feeds", fresh["id"]), ("publish", fresh["id"])]
+
+
+def test_lookup_stays_under_a_millisecond():
+    rng = random.Random(7)
+    organizations = ["Staff Selection Commission", "Railway Recruitment Board", "Union Public Service Commission",
+                     "State Bank of India", "Bharat Heavy Electricals Limited", "Indian Army"]
+    words = [f"w{i}" for i in range(5000)]
+
+    def make_job(job_id):
+        title = " ".join(rng.sample(words, 4))
+        return {
+            "id": job_id,
+            "title": f"{title} 2025",
+            "organization": rng.choice(organizations),
+            "description": " ".join(rng.sample(words, 40)),
+            "status": "active",
+        }
+
+    detector = DuplicateDetector()
+    jobs = [make_job(f"job-{i}") for i in range(BENCHMARK_JOBS)]
+    for job in jobs:
+        detector.upsert(job)
+
+    probes = [make_job(f"probe-{i}") for i in range(500)]
+    probes += [{**job, "id": f"copy-{n}"} for n, job in enumerate(rng.sample(jobs, 500))]
+    timings = []
+    for probe in probes:
+        started = time.perf_counter()
+        match = detector.find_duplicate(probe)
+        timings.append(time.perf_counter() - started)
+        if probe["id"].startswith("copy-"):
+            assert match is not None
+    timings.sort()
+    p99 = timings[int(len(timings) * 0.99)]
+    assert p99 < 0.001
+    print(f"\nduplicate lookup over {BENCHMARK_JOBS} jobs: median {timings[len(timings) // 2] * 1e6:.0f} us, "
+          f"p99 {p99 * 1e6:.0f} us")
@@ -0,0 +1,202 @@
+"""Email delivery: the ledger (claims, retries, idle without SendGrid) and job alerts sent after the response."""
+import asyncio
+import time
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+from fastapi import BackgroundTasks
+
+from email_ledger import CLAIMED, SENT, EmailLedger, JOB_ALERT
+
+
+def states(db):
+    return {delivery["_id"]: delivery["state"] for delivery in db.email_deliveries.documents}
+
+
+def test_claims_become_sent_and_are_never_claimed_twice(db):
+    ledger = EmailLedger()
+    keys = [ledger.key(f"u{i}", JOB_ALERT, "job-1") for i in range(3)]
+
+    async def scenario():
+        assert await ledger.claim(db, keys) == set(keys)
+        assert set(states(db).values()) == {CLAIMED}
+
+        await ledger.mark_sent(db, keys[:2])
+        await ledger.release(db, keys[2:])
+        assert states(db) == {keys[0]: SENT, keys[1]: SENT}
+
+        # Sent keys are skipped (Bloom hit, confirmed by one read); the released one is claimable again
+        assert await ledger.claim(db, keys) == {keys[2]}
+        # Releasing never drops a delivery record
+        await ledger.release(db, keys)
+        assert states(db) == {keys[0]: SENT, keys[1]: SENT}
+
+    asyncio.run(scenario())
+
+
+def test_a_claim_left_by_a_crash_is_retried_once_it_expires(db):
+    ledger = EmailLedger(claim_seconds=900)
+    key = ledger.key("u1", JOB_ALERT, "job-1")
+
+    async def scenario():
+        assert await ledger.claim(db, [key]) == {key}
+        # Another worker (or a fresh Bloom filter) sees the live claim
+        assert await EmailLedger().claim(db, [key]) == set()
+        assert await ledger.claim(db, [key]) == set()
+
+        db.email_deliveries.documents[0]["expires_at"] = datetime.utcnow() - timedelta(seconds=1)
+        assert await EmailLedger().claim(db, [key]) == {key}
+        assert await ledger.claim(db, [key]) == set()
+
+    asyncio.run(scenario())
+
+
+def make_job():
+    from models import Job
+
+    return Job(
+        title="SSC GD Constable 2025",
+        organization="Staff Selection Commission",
+        description="Constable recruitment",
+        category="police_defence",
+        location="All India",
+        state="Delhi",
+        min_education="12th",
+        total_posts=39481,
+        application_start_date=datetime.utcnow(),
+        application_end_date=datetime.utcnow() + timedelta(days=30),
+        created_by="admin",
+    )
+
+
+USERS = [{"id": f"u{i}", "email": f"u{i}@example.com", "full_name": f"User {i}"} for i in range(10)]
+
+
+def test_alert_batch_marks_only_successful_sends(db, monkeypatch):
+    import server
+
+    async def send_job_alert(user, jobs):
+        return int(user.id[1:]) % 2 == 0
+
+    monkeypatch.setattr(server.email_service, "api_key", "test-key")
+    monkeypatch.setattr(server.email_service, "send_job_alert", send_job_alert)
+    job = make_job()
+
+    asyncio.run(server.send_job_alert_batch(db, job, USERS))
+
+    assert states(db) == {server.email_ledger.key(f"u{i}", JOB_ALERT, job.id): SENT for i in range(0, 10, 2)}
+
+
+def test_alerts_skip_the_ledger_when_sendgrid_is_not_configured(db, monkeypatch):
+    import server
+
+    monkeypatch.setattr(server.email_service, "api_key", None)
+
+    asyncio.run(server.send_job_alert_batch(db, make_job(), USERS))
+
+    assert db.writes().get("email_deliveries", 0) == 0
+
+
+def test_single_emails_skip_the_ledger_when_sendgrid_is_not_configured(db, monkeypatch):
+    import server
+
+    monkeypatch.setattr(server.email_service, "api_key", None)
+
+    async def send():
+        raise AssertionError("nothing should be sent without SendGrid")
+
+    assert asyncio.run(server.send_email_once(db, "u1:welcome:-", send)) is False
+    assert db.writes().get("email_deliveries", 0) == 0
+
+
+def test_create_job_returns_before_alerts_are_sent(db, monkeypatch):
+    import server
+    from dedup import DuplicateDetector
+    from models import JobCreate
+
+    monkeypatch.setattr(server, "job_duplicates", DuplicateDetector())
+    monkeypatch.setattr(server, "job_indexes", [])
+    release = asyncio.Event()
+    sent = []
+
+    async def publish_job(job):
+        pass
+
+    async def slow_alerts(db, job):
+        await release.wait()
+        sent.append(job.id)
+
+    monkeypatch.setattr(server.event_broker, "publish_job", publish_job)
+    monkeypatch.setattr(server, "send_job_alerts_to_users", slow_alerts)
+
+    async def scenario():
+        tasks = BackgroundTasks()
+        # Would time out if the handler awaited the fan-out
+        job = await asyncio.wait_for(server.create_job(JobCreate(**make_job().dict()), tasks, db), timeout=1)
+        assert sent == []
+
+        # The alerts go out once the response has been sent
+        after_response = asyncio.create_task(tasks())
+        await asyncio.sleep(0)
+        assert sent == []
+        release.set()
+        await after_response
+        assert sent == [job.id]
+
+    asyncio.run(scenario())
+
+
+def test_alerts_stop_at_the_recipient_cap(db, monkeypatch):
+    import server
+
+    db.users.documents.extend(
+        {**user, "notification_preferences": {"email_alerts": True}, "preferred_job_categories": [],
+         "education_level": "12th"}
+        for user in USERS
+    )
+    batches = []
+
+    async def send_job_alert_batch(db, job, users):
+        batches.append(len(users))
+
+    monkeypatch.setattr(server, "send_job_alert_batch", send_job_alert_batch)
+    monkeypatch.setattr(server, "ALERT_BATCH_SIZE", 4)
+    monkeypatch.setattr(server, "ALERT_MAX_RECIPIENTS", 7)
+
+    asyncio.run(server.send_job_alerts_to_users(db, make_job()))
+    assert batches == [4, 3]
+
+    # 0 lifts the cap
+    monkeypatch.setattr(server, "ALERT_MAX_RECIPIENTS", 0)
+    asyncio.run(server.send_job_alerts_to_users(db, make_job()))
+    assert batches[2:] == [4, 4, 2]
+
+
+def test_sendgrid_calls_run_off_the_event_loop(monkeypatch):
+    from email_service import EmailService
+
+    class SlowSendGrid:
+        def send(self, message):
+            time.sleep(0.2)
+            return SimpleNamespace(status_code=202)
+
+    service = EmailService()
+    service.api_key = "test-key"
+    service._sg = SlowSendGrid()
+
+    async def scenario():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.create_task(tick())
+        assert await service.send_email("u1@example.com", "Subject", "<p>Body</p>")
+        ticker.cancel()
+        return ticks
+
+    # The loop keeps serving other work while SendGrid blocks
+    assert asyncio.run(scenario()) >= 5
@@ -0,0 +1,141 @@
+"""Streaming exports: spreadsheet-safe CSV and memory that doesn't grow with the row count."""
+import asyncio
+import csv
+import io
+import json
+import os
+import tracemalloc
+from datetime import datetime
+
+import httpx
+
+from auth import create_access_token
+from export import stream_job_applications, stream_users
+from models import User, UserRole
+
+BENCHMARK_APPLICATIONS = int(os.getenv("BENCHMARK_APPLICATIONS", "200000"))
+APPLICANTS = 1000
+
+
+def collect(stream):
+    async def consume():
+        return "".join([chunk async for chunk in stream])
+
+    return asyncio.run(consume())
+
+
+def test_csv_cells_cannot_start_a_formula(db):
+    db.users.documents.extend([
+        {"id": "u1", "email": "a@example.com", "full_name": '=HYPERLINK("http://evil.example","x")',
+         "phone": "+919876543210", "location": "@SUM(A1)", "preferred_job_categories": ["-1+2"]},
+        {"id": "u2", "email": "b@example.com", "full_name": "\tTabbed", "phone": "\r9876", "location": "Delhi"},
+    ])
+
+    rows = list(csv.DictReader(io.StringIO(collect(stream_users(db)))))
+
+    assert rows[0]["full_name"] == '\'=HYPERLINK("http://evil.example","x")'
+    assert rows[0]["phone"] == "'+919876543210"
+    assert rows[0]["location"] == "'@SUM(A1)"
+    assert rows[0]["preferred_job_categories"] == "'-1+2"
+    assert rows[1]["full_name"] == "'\tTabbed"
+    assert rows[1]["phone"] == "'\r9876"
+    assert rows[1]["location"] == "Delhi"
+    # JSONL is data, not a spreadsheet, so values stay as they are
+    assert json.loads(collect(stream_users(db, "jsonl")).splitlines()[0])["phone"] == "+919876543210"
+
+
+class StreamingCursor:
+    """Yields documents one at a time, as a server-side cursor would."""
+
+    def __init__(self, documents):
+        self.documents = documents
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for document in self.documents:
+            yield document
+
+
+def generated_applications(count):
+    applied_at = datetime(2025, 6, 1)
+    for n in range(count):
+        yield {
+            "id": f"application-{n}",
+            "job_id": "rrb-ntpc",
+            "user_id": f"user-{n % APPLICANTS}",
+            "status": "pending",
+            "applied_at": applied_at,
+        }
+
+
+def test_exports_require_an_admin(db):
+    import server
+
+    admin = User(email="admin@example.com", full_name="Admin", role=UserRole.ADMIN)
+    user = User(email="user@example.com", full_name="Applicant")
+    db.users.documents.extend([admin.dict(), user.dict()])
+    db.jobs.documents.append({"id": "rrb-ntpc", "title": "RRB NTPC"})
+    server.app.dependency_overrides[server.get_database] = lambda: db
+    try:
+        async def statuses(headers):
+            transport = httpx.ASGITransport(app=server.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                return [
+                    (await client.get(path, headers=headers)).status_code
+                    for path in ("/api/admin/users/export", "/api/admin/jobs/rrb-ntpc/applications/export")
+                ]
+
+        anonymous = asyncio.run(statuses({}))
+        applicant = asyncio.run(statuses({"Authorization": f"Bearer {create_access_token({'sub': user.email})}"}))
+        forged = asyncio.run(statuses({"Authorization": "Bearer not-a-token"}))
+        authorized = asyncio.run(statuses({"Authorization": f"Bearer {create_access_token({'sub': admin.email})}"}))
+    finally:
+        server.app.dependency_overrides.clear()
+
+    assert all(status in (401, 403) for status in anonymous)
+    assert applicant == [403, 403]
+    assert forged == [401, 401]
+    assert authorized == [200, 200]
+
+
+def export_peak(db, monkeypatch, count):
+    # Applications are generated lazily and users are looked up by id, so only
+    # the exporter's own working set is measured
+    users = {user["id"]: user for user in db.users.documents}
+    monkeypatch.setattr(db.applications, "find", lambda *args, **kwargs: StreamingCursor(generated_applications(count)))
+    monkeypatch.setattr(db.users, "find", lambda query, projection=None, **kwargs: StreamingCursor(
+        [users[user_id] for user_id in query["id"]["$in"] if user_id in users]
+    ))
+
+    async def consume():
+        rows = 0
+        async for chunk in stream_job_applications(db, "rrb-ntpc", batch_size=500):
+            rows += chunk.count("\n")
+        return rows
+
+    tracemalloc.start()
+    try:
+        rows = asyncio.run(consume())
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    assert rows == count + 1
+    return peak
+
+
+def test_export_memory_stays_flat_as_applications_grow(db, monkeypatch):
+    db.users.documents.extend(
+        {"id": f"user-{i}", "full_name": f"Applicant {i}", "email": f"user{i}@example.com",
+         "phone": "9876543210", "location": "Bihar", "education_level": "graduate"}
+        for i in range(APPLICANTS)
+    )
+
+    small = export_peak(db, monkeypatch, BENCHMARK_APPLICATIONS // 20)
+    large = export_peak(db, monkeypatch, BENCHMARK_APPLICATIONS)
+
+    # 20x the rows, same working set: one batch of rows plus its applicants
+    assert large < small * 1.5
+    print(f"\nexport peak memory: {small / 1024:.0f} KiB for {BENCHMARK_APPLICATIONS // 20} rows, "
+          f"{large / 1024:.0f} KiB for {BENCHMARK_APPLICATIONS} rows")
@@ -0,0 +1,105 @@
+"""Facet counts over the in-memory bitmaps: disjunctive counts, buckets and slot reuse."""
+import asyncio
+import random
+
+from facets import FacetIndex, salary_bucket
+
+
+def job(job_id, category, state, education="graduate", salary=None, status="active"):
+    return {
+        "id": job_id,
+        "category": category,
+        "state": state,
+        "min_education": education,
+        "salary_min": salary,
+        "status": status,
+    }
+
+
+JOBS = [
+    job("j1", "banking", "Delhi", salary=25000),
+    job("j2", "banking", "Gujarat", education="post_graduate", salary=45000),
+    job("j3", "railway", "Delhi", education="12th", salary=19999),
+    job("j4", "railway", "Bihar", education="12th", salary=80000),
+    job("j5", "teaching", "delhi "),
+    job("j6", "banking", "Delhi", status="closed", salary=25000),
+]
+
+
+def loaded_index(db):
+    db.jobs.documents.extend(JOBS)
+    index = FacetIndex()
+    asyncio.run(index.load(db))
+    return index
+
+
+def test_each_facet_ignores_its_own_filter(db):
+    index = loaded_index(db)
+
+    result = index.counts({"category": "banking", "state": "Delhi"})
+
+    assert result["total"] == 1
+    # Categories are counted under the state filter only...
+    assert result["facets"]["category"] == {"banking": 1, "railway": 1, "teaching": 1}
+    # ...and states under the category filter only
+    assert result["facets"]["state"] == {"Delhi": 1, "Gujarat": 1}
+    # Other facets see both filters
+    assert result["facets"]["min_education"] == {"graduate": 1}
+    assert result["facets"]["salary"] == {"20k_40k": 1}
+
+
+def test_salary_buckets_and_bucket_filter(db):
+    assert [salary_bucket(s) for s in (None, 0, 19999, 20000, 39999, 40000, 69999, 70000)] == [
+        "not_specified", "under_20k", "under_20k", "20k_40k", "20k_40k", "40k_70k", "40k_70k", "70k_plus",
+    ]
+    index = loaded_index(db)
+
+    assert index.counts({})["facets"]["salary"] == {
+        "20k_40k": 1, "40k_70k": 1, "under_20k": 1, "70k_plus": 1, "not_specified": 1,
+    }
+    result = index.counts({"salary": "under_20k", "category": "railway"})
+    assert result["total"] == 1
+    assert result["facets"]["salary"] == {"under_20k": 1, "70k_plus": 1}
+
+
+def test_state_values_are_case_and_space_folded(db):
+    index = loaded_index(db)
+
+    # "Delhi" and "delhi " share one bucket, shown with the first label seen
+    assert index.counts({})["facets"]["state"]["Delhi"] == 3
+    assert index.counts({"state": "  DELHI"})["total"] == 3
+    assert index.counts({"state": "Kerala"})["total"] == 0
+
+
+def test_removed_slots_are_reused_and_counts_stay_exact(db):
+    index = loaded_index(db)
+    slots_before = index._next_slot
+
+    index.remove("j1")
+    index.remove("j1")  # no-op
+    index.upsert(job("j7", "police_defence", "Bihar", salary=30000))
+    assert index._next_slot == slots_before
+    assert index.counts({"category": "banking"})["total"] == 1
+    assert index.counts({"state": "Bihar"})["facets"]["category"] == {"railway": 1, "police_defence": 1}
+
+    # Closing a job through upsert frees its slot and empty values disappear
+    index.upsert(job("j5", "teaching", "delhi ", status="closed"))
+    assert "teaching" not in index.counts({})["facets"]["category"]
+
+    # Random churn agrees with counting the surviving jobs directly
+    rng = random.Random(3)
+    live = {j["id"]: j for j in JOBS if j["status"] == "active" and j["id"] not in ("j1", "j5")}
+    live["j7"] = job("j7", "police_defence", "Bihar", salary=30000)
+    for n in range(500):
+        job_id = f"r{rng.randrange(60)}"
+        if rng.random() < 0.3:
+            index.remove(job_id)
+            live.pop(job_id, None)
+        else:
+            live[job_id] = job(job_id, rng.choice(["banking", "railway"]), rng.choice(["Delhi", "Bihar"]),
+                               salary=rng.choice([None, 10000, 50000]))
+            index.upsert(live[job_id])
+    for category in ("banking", "railway"):
+        expected = sum(1 for j in live.values() if j["category"] == category and j["state"].strip() == "Bihar")
+        assert index.counts({"category": category, "state": "bihar"})["total"] == expected
+    assert index._next_slot == len(live) + len(index._free_slots)
@@ -0,0 +1,115 @@
+"""Precomputed feeds: fan-out of new jobs over stored profiles and rebuild rules."""
+import asyncio
+from datetime import datetime, timedelta
+
+from feed import FeedBuilder
+
+
+def make_job(job_id, category, created_at, **fields):
+    job = {
+        "id": job_id,
+        "category": category,
+        "min_education": "graduate",
+        "state": "Bihar",
+        "status": "active",
+        "views": 0,
+        "applications_count": 0,
+        "created_at": created_at,
+    }
+    job.update(fields)
+    return job
+
+
+def feed_ids(db, user_id):
+    feed = next(feed for feed in db.feeds.documents if feed["user_id"] == user_id)
+    return [entry["job_id"] for entry in feed["entries"]]
+
+
+def test_new_job_reaches_every_feed_it_ranks_in(db):
+    builder = FeedBuilder(feed_size=3)
+    now = datetime.utcnow()
+    db.jobs.documents.extend(make_job(f"old-{i}", "banking", now - timedelta(days=30 + i)) for i in range(3))
+    db.users.documents.extend([
+        {"id": "banker", "preferred_job_categories": ["banking"], "education_level": "graduate"},
+        {"id": "railfan", "preferred_job_categories": ["railway"], "education_level": "graduate"},
+    ])
+
+    async def scenario():
+        await builder.build(db, "banker")
+        await builder.build(db, "railfan")
+        writes_before = db.writes().get("feeds", 0)
+
+        # Newer than everything: ranks in both feeds, not just the category followers'
+        fresh = make_job("fresh-railway", "railway", now)
+        db.jobs.documents.append(fresh)
+        await builder.add_job(db, fresh)
+        assert feed_ids(db, "railfan")[0] == "fresh-railway"
+        assert feed_ids(db, "banker")[0] == "fresh-railway"
+
+        # Older than a full feed's last entry: filtered out, not pushed and sliced off
+        stale = make_job("stale", "banking", now - timedelta(days=365))
+        await builder.add_job(db, stale)
+        assert "stale" not in feed_ids(db, "banker")
+        assert db.writes()["feeds"] - writes_before == 2
+
+    asyncio.run(scenario())
+
+
+def test_feeds_rebuild_when_stale_or_mostly_closed(db):
+    builder = FeedBuilder(feed_size=4, max_age=timedelta(hours=1))
+    now = datetime.utcnow()
+    db.jobs.documents.extend(make_job(f"job-{i}", "banking", now - timedelta(days=i)) for i in range(4))
+    db.users.documents.append({"id": "u1", "preferred_job_categories": ["banking"]})
+
+    async def close(*job_ids):
+        for job in db.jobs.documents:
+            if job["id"] in job_ids:
+                job["status"] = "closed"
+        await builder.remove_jobs(db, list(job_ids))
+
+    async def scenario():
+        await builder.get_job_ids(db, "u1")
+        feed = db.feeds.documents[0]
+        built_at = feed["built_at"]
+        assert feed["built_size"] == 4
+
+        # One closed job leaves the feed usable as is
+        await close("job-0")
+        assert await builder.get_job_ids(db, "u1") == ["job-1", "job-2", "job-3"]
+        assert db.feeds.documents[0]["built_at"] == built_at
+
+        # Half the feed gone: rebuilt from the jobs that are still active
+        await close("job-1", "job-2")
+        db.jobs.documents.append(make_job("job-4", "banking", now))
+        assert await builder.get_job_ids(db, "u1") == ["job-4", "job-3"]
+        assert db.feeds.documents[0]["built_at"] > built_at
+
+        # Too old: rebuilt even though it is full
+        db.feeds.documents[0]["built_at"] = now - timedelta(hours=2)
+        await builder.get_job_ids(db, "u1")
+        assert db.feeds.documents[0]["built_at"] > now - timedelta(hours=1)
+
+    asyncio.run(scenario())
+
+
+def test_profile_match_outweighs_a_few_days_of_recency(db):
+    builder = FeedBuilder(feed_size=10)
+    now = datetime.utcnow()
+    db.jobs.documents.extend([
+        make_job("matching", "banking", now - timedelta(days=3), state="Bihar"),
+        make_job("unrelated", "railway", now, min_education="12th", state="Kerala"),
+        make_job("stale-match", "banking", now - timedelta(days=30)),
+        make_job("repost", "banking", now, duplicate_of="matching"),
+    ])
+    db.users.documents.append(
+        {"id": "u1", "preferred_job_categories": ["banking"], "education_level": "graduate", "location": "Bihar"}
+    )
+
+    async def scenario():
+        assert await builder.get_job_ids(db, "u1") == ["matching", "stale-match", "unrelated"]
+
+        # Recency halves every three days and stays on the scale of the bonuses
+        scores = [builder.score({}, make_job("j", "banking", now - timedelta(days=d)), now) for d in (0, 3, 6)]
+        assert scores == [5.0, 2.5, 1.25]
+
+    asyncio.run(scenario())
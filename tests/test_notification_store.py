@@ -0,0 +1,119 @@
+"""Inbox behaviour plus a 500k-user / daily-broadcast benchmark."""
+import asyncio
+import os
+import time
+from datetime import datetime
+
+from models import NotificationCreate, NotificationType
+from notification_store import NotificationStore
+
+BENCHMARK_USERS = int(os.getenv("BENCHMARK_USERS", "500000"))
+
+
+def broadcast(title):
+    return NotificationCreate(title=title, message="Apply before the deadline", type=NotificationType.JOB_ALERT)
+
+
+def test_marking_one_broadcast_read_leaves_older_ones_unread(db):
+    store = NotificationStore()
+
+    async def scenario():
+        await store.init_user(db, "u1")
+        for day in range(3):
+            await store.create(db, broadcast(f"day {day}"))
+        ids = [n["id"] for n in sorted(db.broadcast_notifications.documents, key=lambda n: n["seq"])]
+
+        await store.mark_read(db, "u1", [ids[2]])
+        items, _ = await store.list_inbox(db, "u1")
+        read = {item.id: item.is_read for item in items}
+        assert read == {ids[0]: False, ids[1]: False, ids[2]: True}
+        assert await store.unread_count(db, "u1") == 2
+
+        # Reading the rest in any order folds everything into the watermark
+        await store.mark_read(db, "u1", [ids[0]])
+        await store.mark_read(db, "u1", [ids[1]])
+        state = await db.notification_state.find_one({"user_id": "u1"})
+        assert state["broadcast_seen_seq"] == 3 and state["broadcast_read_seqs"] == []
+        assert await store.unread_count(db, "u1") == 0
+
+    asyncio.run(scenario())
+
+
+def test_targeted_and_broadcast_unread_counts(db):
+    store = NotificationStore()
+
+    async def scenario():
+        await store.init_user(db, "u1")
+        await store.init_user(db, "u2")
+        await store.create(db, broadcast("everyone"))
+        await store.create(db, NotificationCreate(
+            title="Admit card", message="Download now", type=NotificationType.ADMIT_CARD, user_ids=["u1"],
+        ))
+        assert await store.unread_count(db, "u1") == 2
+        assert await store.unread_count(db, "u2") == 1
+
+        await store.mark_read(db, "u1")
+        assert await store.unread_count(db, "u1") == 0
+        assert await store.unread_count(db, "u2") == 1
+
+    asyncio.run(scenario())
+
+
+def test_daily_broadcasts_to_many_users_write_one_document_each(db):
+    """A month of daily broadcasts to BENCHMARK_USERS users costs one write per broadcast."""
+    store = NotificationStore()
+    db.notification_state.documents.extend(
+        {"user_id": f"user-{i}", "unread": 0, "broadcast_seen_seq": 0} for i in range(BENCHMARK_USERS)
+    )
+
+    async def scenario():
+        started = time.perf_counter()
+        for day in range(30):
+            await store.create(db, broadcast(f"Daily job digest {day}"))
+        fan_out_seconds = time.perf_counter() - started
+
+        writes = db.writes()
+        assert writes["broadcast_notifications"] == 30
+        assert writes.get("notification_state", 0) == 0
+
+        # Reads touch the user's state document and one page of each collection
+        user = f"user-{BENCHMARK_USERS - 1}"
+        assert await store.unread_count(db, user) == 30
+        items, cursor = await store.list_inbox(db, user, limit=20)
+        assert len(items) == 20 and cursor
+        await store.mark_read(db, user, [items[0].id])
+        assert await store.unread_count(db, user) == 29
+        print(f"\n30 broadcasts to {BENCHMARK_USERS} users: {fan_out_seconds * 1000:.1f} ms, "
+              f"{sum(writes.values())} document writes (broadcasts + sequence counter)")
+
+    asyncio.run(scenario())
+
+
+def test_counter_starts_from_notifications_stored_before_the_state(db):
+    store = NotificationStore()
+    db.notifications.documents.extend(
+        {"id": f"old-{i}", "user_id": "u1", "title": "Old", "message": "Stored before the counter existed",
+         "type": "job_alert", "is_read": False, "created_at": datetime(2025, 1, 1, 0, i)}
+        for i in range(3)
+    )
+    db.notifications.documents.append({
+        "id": "elsewhere", "user_id": "u2", "title": "Old", "message": "Not u1's",
+        "type": "job_alert", "is_read": False, "created_at": datetime(2025, 1, 1),
+    })
+
+    async def scenario():
+        assert await store.unread_count(db, "u1") == 3
+        await store.mark_read(db, "u1", ["old-0", "old-1", "old-2"])
+        await store.create(db, NotificationCreate(
+            title="Admit card", message="Download now", type=NotificationType.ADMIT_CARD, user_ids=["u1", "u2"],
+        ))
+        await store.create(db, NotificationCreate(
+            title="Result", message="Declared", type=NotificationType.RESULT_ANNOUNCEMENT, user_ids=["u1"],
+        ))
+        assert await store.unread_count(db, "u1") == 2
+        state = await db.notification_state.find_one({"user_id": "u1"})
+        assert state["unread"] == 2
+        # u2's state is first created by the targeted send, on top of its older unread one
+        assert await store.unread_count(db, "u2") == 2
+
+    asyncio.run(scenario())
@@ -0,0 +1,109 @@
+"""Routing and back-pressure for the in-process event broker with thousands of local clients."""
+import asyncio
+import json
+import random
+import time
+
+import pytest
+
+from realtime import EventBroker
+
+CATEGORIES = ["banking", "railway", "police_defence", "teaching"]
+STATES = ["delhi", "gujarat", "maharashtra", "bihar"]
+
+
+def drain(subscriber):
+    messages = []
+    while not subscriber.queue.empty():
+        messages.append(subscriber.queue.get_nowait())
+    return messages
+
+
+def payload(message):
+    return json.loads(message.split("data: ", 1)[1])
+
+
+def test_thousands_of_subscribers_receive_only_matching_events():
+    rng = random.Random(42)
+
+    async def scenario():
+        broker = EventBroker()
+        subscribers = []
+        for i in range(5000):
+            subscribers.append(broker.subscribe(
+                category=rng.choice(CATEGORIES + [None]),
+                state=rng.choice(STATES + [None]),
+                user_id=f"user-{i % 1000}",
+                max_queue=1000,
+            ))
+
+        jobs = [
+            {"id": f"job-{n}", "category": rng.choice(CATEGORIES), "state": rng.choice(STATES).title()}
+            for n in range(200)
+        ]
+        started = time.perf_counter()
+        for job in jobs:
+            await broker.publish_job(job)
+        await broker.publish_notification({"id": "n-targeted"}, ["user-7", "user-8"])
+        await broker.publish_notification({"id": "n-broadcast"}, [])
+        elapsed = time.perf_counter() - started
+
+        for subscriber in subscribers:
+            received = [payload(message) for message in drain(subscriber)]
+            expected_jobs = [
+                job["id"] for job in jobs
+                if (subscriber.category in (None, job["category"]))
+                and (subscriber.state in (None, job["state"].lower()))
+            ]
+            assert [event["id"] for event in received if "category" in event] == expected_jobs
+            notifications = [event["id"] for event in received if "category" not in event]
+            if subscriber.user_id in ("user-7", "user-8"):
+                assert notifications == ["n-targeted", "n-broadcast"]
+            else:
+                assert notifications == ["n-broadcast"]
+            assert subscriber.dropped == 0
+
+        print(f"\n202 events to 5000 subscribers routed in {elapsed * 1000:.1f} ms")
+
+    asyncio.run(scenario())
+
+
+def test_unsubscribe_stops_delivery_and_prunes_indexes():
+    async def scenario():
+        broker = EventBroker()
+        subscriber = broker.subscribe(category="banking", user_id="u1")
+        broker.unsubscribe(subscriber)
+        await broker.publish_job({"id": "j1", "category": "banking", "state": "Delhi"})
+        await broker.publish_notification({"id": "n1"}, ["u1"])
+        assert drain(subscriber) == []
+        assert broker.subscriber_count == 0
+        assert not broker._by_category and not broker._by_user
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("policy, expected_ids, closed", [
+    ("drop_oldest", ["job-7", "job-8", "job-9"], False),
+    ("drop_newest", ["job-0", "job-1", "job-2"], False),
+    ("disconnect", ["job-0", "job-1", "job-2"], True),
+])
+def test_drop_policies_under_a_full_queue(policy, expected_ids, closed):
+    async def scenario():
+        broker = EventBroker()
+        slow = broker.subscribe(max_queue=3, drop_policy=policy)
+        fast = broker.subscribe(max_queue=100)
+        for n in range(10):
+            await broker.publish_job({"id": f"job-{n}", "category": "banking", "state": "Delhi"})
+
+        # One stalled client never affects the others
+        assert len(drain(fast)) == 10
+        assert slow.closed is closed
+        assert slow.dropped == (1 if policy == "disconnect" else 7)
+        assert [payload(message)["id"] for message in drain(slow)] == expected_ids
+        if closed:
+            with pytest.raises(ConnectionAbortedError):
+                await slow.next_message(timeout=0.01)
+        else:
+            assert await slow.next_message(timeout=0.01) is None
+
+    asyncio.run(scenario())
@@ -0,0 +1,60 @@
+"""Job lifecycle sweeper: closing expired jobs and opt-in closing reminders."""
+import asyncio
+from datetime import datetime, timedelta
+
+from scheduler import JobLifecycleSweeper
+
+NOW = datetime(2025, 6, 1, 12, 0)
+
+
+def job(job_id, ends_in, category="banking"):
+    return {
+        "id": job_id,
+        "title": f"Job {job_id}",
+        "category": category,
+        "status": "active",
+        "application_end_date": NOW + ends_in,
+    }
+
+
+def test_expired_jobs_are_closed_in_batches_and_hooks_notified(db):
+    db.jobs.documents.extend([job(f"old-{i}", timedelta(days=-1)) for i in range(5)] + [job("open", timedelta(days=5))])
+    sweeper = JobLifecycleSweeper(batch_size=2)
+    closed_batches = []
+    sweeper.on_closed(closed_batches.append)
+
+    closed = asyncio.run(sweeper.close_expired_jobs(db, NOW))
+
+    assert sorted(closed) == [f"old-{i}" for i in range(5)]
+    assert [len(batch) for batch in closed_batches] == [2, 2, 1]
+    statuses = {doc["id"]: doc["status"] for doc in db.jobs.documents}
+    assert statuses.pop("open") == "active"
+    assert set(statuses.values()) == {"closed"}
+
+
+def test_closing_reminders_are_off_by_default(db):
+    db.jobs.documents.append(job("closing", timedelta(hours=12)))
+    db.users.documents.append({"id": "u1", "preferred_job_categories": ["banking"]})
+
+    assert asyncio.run(JobLifecycleSweeper().send_closing_reminders(db, NOW)) == 0
+    assert db.writes().get("notifications", 0) == 0
+    assert "closing_reminder_sent" not in db.jobs.documents[0]
+
+
+def test_closing_reminders_target_category_followers_who_have_not_applied(db):
+    db.jobs.documents.extend([job("closing", timedelta(hours=12)), job("later", timedelta(days=9))])
+    db.users.documents.extend([
+        {"id": "follower", "preferred_job_categories": ["banking"]},
+        {"id": "applicant", "preferred_job_categories": ["banking"]},
+        {"id": "other", "preferred_job_categories": ["railway"]},
+    ])
+    db.applications.documents.append({"job_id": "closing", "user_id": "applicant"})
+    sweeper = JobLifecycleSweeper(closing_reminders=True, batch_size=1)
+
+    assert asyncio.run(sweeper.send_closing_reminders(db, NOW)) == 1
+    assert [(n["user_id"], n["job_id"]) for n in db.notifications.documents] == [("follower", "closing")]
+    assert db.broadcast_notifications.documents == []
+
+    # Claimed: a second sweep (or another worker) doesn't remind again
+    assert asyncio.run(sweeper.send_closing_reminders(db, NOW)) == 0
+    assert len(db.notifications.documents) == 1
@@ -0,0 +1,156 @@
+"""Typeahead over a 100k-job index: cold-prefix latency, memory, and exact incremental updates."""
+import asyncio
+import gc
+import os
+import random
+import time
+import tracemalloc
+
+from suggest import SuggestionIndex, normalize
+
+BENCHMARK_JOBS = int(os.getenv("BENCHMARK_JOBS", "100000"))
+
+ORGANIZATIONS = [
+    "Bank of Baroda", "State Bank of India", "Railway Recruitment Board", "Staff Selection Commission",
+    "Union Public Service Commission", "Indian Army", "Delhi Police", "Kendriya Vidyalaya Sangathan",
+]
+POSTS = ["Clerk", "Probationary Officer", "Constable", "Junior Engineer", "Teacher", "Assistant", "Technician"]
+STATES = ["Delhi", "Gujarat", "Maharashtra", "Bihar", "Uttar Pradesh", "Karnataka", "Tamil Nadu"]
+QUERIES = ["b", "ba", "ban", "bank of", "st", "staff sel", "rail", "kar", "co", "const", "clerk", "gu", "ut", "tam"]
+
+
+def make_jobs(count, rng):
+    jobs = []
+    for n in range(count):
+        organization = rng.choice(ORGANIZATIONS)
+        state = rng.choice(STATES)
+        jobs.append({
+            "id": f"job-{n}",
+            "title": f"{organization} {rng.choice(POSTS)} {state} {2020 + n % 6} Batch {n % 997}",
+            "organization": organization,
+            "location": f"{state} Circle {n % 50}",
+            "state": state,
+            "status": "active",
+            "views": rng.randint(0, 50000),
+            "applications_count": rng.randint(0, 5000),
+        })
+    return jobs
+
+
+def test_incremental_updates_match_a_fresh_rebuild(db):
+    rng = random.Random(7)
+    db.jobs.documents.extend(make_jobs(3000, rng))
+    index = SuggestionIndex()
+    asyncio.run(index.load(db))
+
+    for job in rng.sample(db.jobs.documents, 300):
+        job["views"] = rng.randint(0, 100000)
+        if rng.random() < 0.3:
+            job["status"] = "closed"
+        index.upsert(job)
+    rebuilt = SuggestionIndex()
+    asyncio.run(rebuilt.load(db))
+
+    for query in QUERIES:
+        assert index.suggest(query, limit=10) == rebuilt.suggest(query, limit=10)
+
+
+def typed_prefixes(jobs, rng, count):
+    """Every keystroke of values users might type, from their first letter or a later word."""
+    prefixes = []
+    for job in rng.sample(jobs, count):
+        text = normalize(job[rng.choice(["title", "organization", "location"])])
+        words = text.split()
+        start = text.index(words[rng.randrange(min(len(words), 3))])
+        prefixes.extend(text[start:end] for end in range(start + 1, len(text) + 1))
+    return prefixes
+
+
+def test_incremental_changes_reach_the_overlay_and_survive_compaction(db):
+    index = SuggestionIndex(overlay_limit=5)
+    db.jobs.documents.extend(make_jobs(200, random.Random(1)))
+    asyncio.run(index.load(db))
+    posted = [
+        {"id": f"new-{n}", "title": f"Indian Coast Guard Navik {n}", "organization": "Indian Coast Guard",
+         "status": "active", "views": n * 100, "applications_count": 0}
+        for n in range(10)
+    ]
+
+    async def scenario():
+        for job in posted:
+            index.upsert(job)
+        assert [s["text"] for s in index.suggest("coast guard navik", limit=3)] == [
+            "Indian Coast Guard Navik 9", "Indian Coast Guard Navik 8", "Indian Coast Guard Navik 7",
+        ]
+        # The overlay outgrew its limit: a compaction runs in a thread and is swapped in
+        await asyncio.sleep(0)
+        index.upsert(dict(posted[0], views=10 ** 6))
+        await index._compaction
+        assert index._state.overlay == []
+        # The change made during the compaction was replayed onto the new generation
+        assert index.suggest("coast guard navik", limit=1)[0]["text"] == "Indian Coast Guard Navik 0"
+
+    asyncio.run(scenario())
+    index.remove("new-0")
+    assert "Indian Coast Guard Navik 0" not in [s["text"] for s in index.suggest("indian coast", limit=20)]
+
+
+def test_suggest_over_many_jobs_stays_under_a_millisecond(db):
+    rng = random.Random(42)
+    jobs = make_jobs(BENCHMARK_JOBS, rng)
+    db.jobs.documents.extend(jobs)
+    index = SuggestionIndex()
+
+    async def load_while_serving():
+        # The event loop keeps answering (e.g. liveness probes) while the index is sorted
+        stalls = []
+
+        async def probe():
+            while True:
+                started = time.perf_counter()
+                await asyncio.sleep(0.005)
+                stalls.append(time.perf_counter() - started - 0.005)
+
+        task = asyncio.create_task(probe())
+        started = time.perf_counter()
+        await index.load(db)
+        elapsed = time.perf_counter() - started
+        task.cancel()
+        return elapsed, max(stalls)
+
+    load_seconds, worst_stall = asyncio.run(load_while_serving())
+
+    gc.collect()
+    tracemalloc.start()
+    measured = SuggestionIndex()
+    asyncio.run(measured.load(db))
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del measured
+
+    # Mostly prefixes nobody typed before: nothing is cached, so each one is a cold lookup
+    prefixes = typed_prefixes(jobs, rng, 200)
+    timings = []
+    for prefix in prefixes:
+        started = time.perf_counter()
+        suggestions = index.suggest(prefix, limit=10)
+        timings.append(time.perf_counter() - started)
+        assert [s["weight"] for s in suggestions] == sorted((s["weight"] for s in suggestions), reverse=True)
+    timings.sort()
+    median = timings[len(timings) // 2]
+    p99 = timings[int(len(timings) * 0.99)]
+    assert p99 < 0.001
+    assert worst_stall < 0.25
+    assert retained / BENCHMARK_JOBS < 1024
+
+    started = time.perf_counter()
+    for job in rng.sample(jobs, 1000):
+        job["views"] += 1000
+        index.upsert(job)
+    update_ms = time.perf_counter() - started  # seconds for 1000 upserts == ms per upsert
+
+    print(f"\n{BENCHMARK_JOBS} jobs: load {load_seconds:.2f}s (longest event loop stall {worst_stall * 1000:.0f} ms), "
+          f"{index.size} entries, {retained / 2 ** 20:.0f} MiB retained ({peak / 2 ** 20:.0f} MiB peak); "
+          f"{len(prefixes)} typed prefixes: median {median * 1e6:.0f} us / p99 {p99 * 1e6:.0f} us / "
+          f"max {timings[-1] * 1e6:.0f} us; upsert {update_ms:.2f} ms")